@@ -106,6 +106,17 @@ DATABASES = {
     )
 }
 
+# Cache shared by all web processes when REDIS_URL is set (agent rate limits live here)
+REDIS_URL = os.getenv('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -173,6 +184,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Trusted reverse proxies in front of Django; unset, throttling keys on REMOTE_ADDR and ignores X-Forwarded-For
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES')) if os.getenv('NUM_PROXIES') else None,
 }
 
 SPECTACULAR_SETTINGS = {
@@ -194,3 +207,83 @@ EMAIL_HOST_PASSWORD = str(os.getenv('EMAIL_HOST_PASSWORD'))
 EMAIL_USE_SSL = False
 
 MONGO_PUBLIC_URL = os.getenv('MONGO_PUBLIC_URL')
+
+# Agent API
+AGENT_OFFLINE_QUEUE_MAX_EVENTS = int(os.getenv('AGENT_OFFLINE_QUEUE_MAX_EVENTS', '10000'))
+AGENT_OFFLINE_QUEUE_BATCH_SIZE = int(os.getenv('AGENT_OFFLINE_QUEUE_BATCH_SIZE', '500'))
+# Seconds between coalesced heartbeat flushes; 0 writes every heartbeat through
+AGENT_HEARTBEAT_FLUSH_INTERVAL = float(os.getenv('AGENT_HEARTBEAT_FLUSH_INTERVAL', '5'))
+AGENT_HEARTBEAT_MAX_PENDING = int(os.getenv('AGENT_HEARTBEAT_MAX_PENDING', '5000'))
+AGENT_CACHE_MAX_SIZE = int(os.getenv('AGENT_CACHE_MAX_SIZE', '20000'))
+AGENT_CACHE_TTL = float(os.getenv('AGENT_CACHE_TTL', '60'))
+# Long-polled agent commands: max hold time, interval of the per-process check for commands queued by other
+# workers, and redelivery timeout
+AGENT_COMMAND_LONG_POLL_TIMEOUT = float(os.getenv('AGENT_COMMAND_LONG_POLL_TIMEOUT', '25'))
+AGENT_COMMAND_POLL_INTERVAL = float(os.getenv('AGENT_COMMAND_POLL_INTERVAL', '5'))
+AGENT_COMMAND_ACK_TIMEOUT = int(os.getenv('AGENT_COMMAND_ACK_TIMEOUT', '300'))
+AGENT_COMMAND_MAX_BATCH = int(os.getenv('AGENT_COMMAND_MAX_BATCH', '50'))
+AGENT_BATCH_MAX_OPERATIONS = int(os.getenv('AGENT_BATCH_MAX_OPERATIONS', '20'))
+AGENT_UPLOAD_BATCH_MAX_FILES = int(os.getenv('AGENT_UPLOAD_BATCH_MAX_FILES', '500'))
+# Pending uploads older than this are expired; the reaper runs every interval seconds (0 disables the in-process reaper)
+AGENT_UPLOAD_PENDING_TTL = int(os.getenv('AGENT_UPLOAD_PENDING_TTL', '21600'))
+AGENT_UPLOAD_REAP_INTERVAL = float(os.getenv('AGENT_UPLOAD_REAP_INTERVAL', '300'))
+AGENT_UPLOAD_REAP_BATCH_SIZE = int(os.getenv('AGENT_UPLOAD_REAP_BATCH_SIZE', '1000'))
+# Bytes of directly uploaded content one completion call hashes before deferring the rest to a later call
+AGENT_UPLOAD_VERIFY_MAX_BYTES = int(os.getenv('AGENT_UPLOAD_VERIFY_MAX_BYTES', str(256 * 1024 * 1024)))
+# Live agents silent for AGENT_OFFLINE_AFTER seconds are marked offline; the sweeper runs every interval seconds
+# (0 disables the in-process sweeper)
+AGENT_OFFLINE_AFTER = int(os.getenv('AGENT_OFFLINE_AFTER', '300'))
+AGENT_LIVENESS_SWEEP_INTERVAL = float(os.getenv('AGENT_LIVENESS_SWEEP_INTERVAL', '60'))
+AGENT_LIVENESS_BATCH_SIZE = int(os.getenv('AGENT_LIVENESS_BATCH_SIZE', '1000'))
+# Upload admission: concurrent transfers and admitted bytes/second, fleet-wide and per agent (0 disables a limit).
+# Pending uploads stop counting as active after AGENT_UPLOAD_ACTIVE_TTL seconds; deferred agents are told to retry after ~AGENT_UPLOAD_RETRY_AFTER
+AGENT_UPLOAD_MAX_ACTIVE = int(os.getenv('AGENT_UPLOAD_MAX_ACTIVE', '1000'))
+AGENT_UPLOAD_MAX_ACTIVE_PER_AGENT = int(os.getenv('AGENT_UPLOAD_MAX_ACTIVE_PER_AGENT', '100'))
+AGENT_UPLOAD_MAX_BYTES_PER_SECOND = int(os.getenv('AGENT_UPLOAD_MAX_BYTES_PER_SECOND', '0'))
+AGENT_UPLOAD_MAX_BYTES_PER_SECOND_PER_AGENT = int(os.getenv('AGENT_UPLOAD_MAX_BYTES_PER_SECOND_PER_AGENT', '0'))
+AGENT_UPLOAD_ADMISSION_WINDOW = int(os.getenv('AGENT_UPLOAD_ADMISSION_WINDOW', '60'))
+AGENT_UPLOAD_ACTIVE_TTL = int(os.getenv('AGENT_UPLOAD_ACTIVE_TTL', '900'))
+AGENT_UPLOAD_RETRY_AFTER = int(os.getenv('AGENT_UPLOAD_RETRY_AFTER', '30'))
+# Deep-scan worker pool (manage.py deep_scan_worker): processes, read chunk size, idle poll interval,
+# seconds before a stuck 'scanning' claim is retried, and matches kept per file
+AGENT_DEEP_SCAN_WORKERS = int(os.getenv('AGENT_DEEP_SCAN_WORKERS', '2'))
+AGENT_DEEP_SCAN_CHUNK_SIZE = int(os.getenv('AGENT_DEEP_SCAN_CHUNK_SIZE', str(1024 * 1024)))
+AGENT_DEEP_SCAN_POLL_INTERVAL = float(os.getenv('AGENT_DEEP_SCAN_POLL_INTERVAL', '5'))
+AGENT_DEEP_SCAN_TIMEOUT = int(os.getenv('AGENT_DEEP_SCAN_TIMEOUT', '600'))
+AGENT_DEEP_SCAN_MAX_MATCHES = int(os.getenv('AGENT_DEEP_SCAN_MAX_MATCHES', '50'))
+# Token-bucket rate limits per (agent_id, client IP) and per client IP: scope -> (requests per second, burst).
+# The per-IP bucket is the scope's budget times AGENT_RATE_LIMIT_IP_MULTIPLIER
+AGENT_RATE_LIMIT_ENABLED = os.getenv('AGENT_RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+AGENT_RATE_LIMITS = {
+    'heartbeat': (float(os.getenv('AGENT_RATE_LIMIT_HEARTBEAT', '1')), int(os.getenv('AGENT_RATE_LIMIT_HEARTBEAT_BURST', '10'))),
+    'upload': (float(os.getenv('AGENT_RATE_LIMIT_UPLOAD', '5')), int(os.getenv('AGENT_RATE_LIMIT_UPLOAD_BURST', '50'))),
+    'offline_queue': (float(os.getenv('AGENT_RATE_LIMIT_OFFLINE_QUEUE', '1')), int(os.getenv('AGENT_RATE_LIMIT_OFFLINE_QUEUE_BURST', '10'))),
+    'commands': (float(os.getenv('AGENT_RATE_LIMIT_COMMANDS', '2')), int(os.getenv('AGENT_RATE_LIMIT_COMMANDS_BURST', '20'))),
+    'config': (float(os.getenv('AGENT_RATE_LIMIT_CONFIG', '1')), int(os.getenv('AGENT_RATE_LIMIT_CONFIG_BURST', '10'))),
+    'events': (float(os.getenv('AGENT_RATE_LIMIT_EVENTS', '10')), int(os.getenv('AGENT_RATE_LIMIT_EVENTS_BURST', '100'))),
+    'batch': (float(os.getenv('AGENT_RATE_LIMIT_BATCH', '2')), int(os.getenv('AGENT_RATE_LIMIT_BATCH_BURST', '20'))),
+    'default': (float(os.getenv('AGENT_RATE_LIMIT_DEFAULT', '5')), int(os.getenv('AGENT_RATE_LIMIT_DEFAULT_BURST', '50'))),
+}
+AGENT_RATE_LIMIT_IP_MULTIPLIER = int(os.getenv('AGENT_RATE_LIMIT_IP_MULTIPLIER', '50'))
+# Largest agent request body accepted after Content-Encoding: gzip/zstd is undone
+AGENT_MAX_DECOMPRESSED_BODY_SIZE = int(os.getenv('AGENT_MAX_DECOMPRESSED_BODY_SIZE', str(64 * 1024 * 1024)))
+# agent_statistics is cached for AGENT_STATS_CACHE_TTL seconds; with AGENT_STATS_INCREMENTAL upload counts come
+# from counters maintained on every status change instead of a scan; run manage.py reconcile_statistics when re-enabling it.
+# The counters are also recounted every AGENT_STATS_RECONCILE_INTERVAL seconds (0 disables the in-process recount)
+AGENT_STATS_CACHE_TTL = float(os.getenv('AGENT_STATS_CACHE_TTL', '10'))
+AGENT_STATS_INCREMENTAL = os.getenv('AGENT_STATS_INCREMENTAL', 'False').lower() == 'true'
+AGENT_STATS_RECONCILE_INTERVAL = float(os.getenv('AGENT_STATS_RECONCILE_INTERVAL', '3600'))
+# Agent, upload and offline event listings: default and maximum rows per page
+AGENT_LIST_PAGE_SIZE = int(os.getenv('AGENT_LIST_PAGE_SIZE', '100'))
+AGENT_LIST_MAX_PAGE_SIZE = int(os.getenv('AGENT_LIST_MAX_PAGE_SIZE', '1000'))
+AGENT_POLICY_REFRESH_INTERVAL = float(os.getenv('AGENT_POLICY_REFRESH_INTERVAL', '30'))
+AGENT_HASH_VERDICT_REFRESH_INTERVAL = float(os.getenv('AGENT_HASH_VERDICT_REFRESH_INTERVAL', '60'))
+AGENT_HASH_VERDICT_OVERLAY_LIMIT = int(os.getenv('AGENT_HASH_VERDICT_OVERLAY_LIMIT', '50000'))
+AGENT_HASH_VERDICT_BLOOM_ERROR_RATE = float(os.getenv('AGENT_HASH_VERDICT_BLOOM_ERROR_RATE', '0.001'))
+# Longest a HashVerdict write may take to commit after its updated_at is set; verdict pulls re-read this window
+AGENT_HASH_VERDICT_PULL_LAG = float(os.getenv('AGENT_HASH_VERDICT_PULL_LAG', '60'))
+
+# MinIO proxy uploads are sent to MinIO from the spooled request body in parts of this size (5MB minimum)
+MINIO_PROXY_PART_SIZE = int(os.getenv('MINIO_PROXY_PART_SIZE', str(8 * 1024 * 1024)))
+MINIO_PROXY_MAX_UPLOAD_SIZE = int(os.getenv('MINIO_PROXY_MAX_UPLOAD_SIZE', str(1024 * 1024 * 1024)))
+MINIO_PROXY_DOWNLOAD_CHUNK_SIZE = int(os.getenv('MINIO_PROXY_DOWNLOAD_CHUNK_SIZE', str(1024 * 1024)))
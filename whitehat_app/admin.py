@@ -2,7 +2,7 @@ from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from whitehat_app.models import User, Campaign, Event, Incident, RiskHistory, Agent, FileUpload, OfflineEvent
+from whitehat_app.models import User, Campaign, Event, Incident, RiskHistory, Agent, FileUpload, OfflineEvent, AgentCommand, FilePolicy, HashVerdict, StoredObject, ScanSignature, UsbWhitelistEntry
 
 
 class UserCreationForm(forms.ModelForm):
@@ -96,8 +96,8 @@ class AgentAdmin(admin.ModelAdmin):
 
 @admin.register(FileUpload)
 class FileUploadAdmin(admin.ModelAdmin):
-    list_display = ('upload_id', 'agent', 'file_path', 'file_size', 'status', 'created_at')
-    list_filter = ('status',)
+    list_display = ('upload_id', 'agent', 'file_path', 'file_size', 'status', 'deduplicated', 'scan_status', 'created_at')
+    list_filter = ('status', 'deduplicated', 'scan_status')
     search_fields = ('upload_id', 'agent__agent_id', 'file_path')
 
 
@@ -106,3 +106,56 @@ class OfflineEventAdmin(admin.ModelAdmin):
     list_display = ('agent', 'event_type', 'timestamp', 'created_at')
     list_filter = ('event_type',)
     search_fields = ('agent__agent_id',)
+
+
+@admin.register(AgentCommand)
+class AgentCommandAdmin(admin.ModelAdmin):
+    list_display = ('agent', 'command_type', 'status', 'created_at', 'delivered_at', 'acknowledged_at')
+    list_filter = ('status', 'command_type')
+    search_fields = ('agent__agent_id',)
+
+
+@admin.register(FilePolicy)
+class FilePolicyAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'is_active', 'enforce_acl', 'max_upload_size', 'created_at')
+    list_filter = ('is_active',)
+    search_fields = ('name',)
+
+
+@admin.register(HashVerdict)
+class HashVerdictAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'verdict', 'source', 'updated_at')
+    list_filter = ('verdict', 'source')
+    search_fields = ('sha256',)
+
+
+@admin.register(StoredObject)
+class StoredObjectAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'object_name', 'verified_at')
+    search_fields = ('sha256',)
+
+
+@admin.register(ScanSignature)
+class ScanSignatureAdmin(admin.ModelAdmin):
+    list_display = ('name', 'pattern_type', 'verdict', 'is_active', 'updated_at')
+    list_filter = ('verdict', 'pattern_type', 'is_active')
+    search_fields = ('name',)
+
+
+@admin.register(UsbWhitelistEntry)
+class UsbWhitelistEntryAdmin(admin.ModelAdmin):
+    list_display = ('vendor_id', 'product_id', 'serial_number', 'scope', 'user', 'agent', 'description', 'is_active', 'version', 'updated_at')
+    list_filter = ('scope', 'is_active')
+    search_fields = ('vendor_id', 'product_id', 'serial_number', 'description', 'user__email', 'agent__agent_id')
+    raw_id_fields = ('user', 'agent')
+    readonly_fields = ('version',)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Entries are resolved per device and scope; change these by deactivating the entry and adding a new one
+        if obj is not None:
+            return self.readonly_fields + ('scope', 'user', 'agent', 'vendor_id', 'product_id', 'serial_number')
+        return self.readonly_fields
+
+    def has_delete_permission(self, request, obj=None):
+        # Deleting would lose the tombstone delta syncs report removals from
+        return False
@@ -0,0 +1,215 @@
+"""
+Agent operations shared by the single-purpose agent endpoints and /batch.
+
+The helpers here hold the endpoint logic that does not depend on how the
+request arrived. The batch endpoint runs every sub-operation synchronously
+inside one transaction, so the `run_*` functions are sync; each takes the
+agent_id, the already resolved AgentIdentity and the sub-operation payload,
+and returns (body, status_code) like the corresponding endpoint would.
+"""
+
+import logging
+
+from django.db import transaction
+from rest_framework import status
+
+from whitehat_app.models import Agent, Incident, Event
+from whitehat_app.agent_cache import agent_cache
+from whitehat_app.command_queue import command_queue
+from whitehat_app.fleet_stats import fleet_stats
+from whitehat_app.hash_verdicts import verdict_index
+from whitehat_app.heartbeat_writer import UnknownUser, heartbeat_writer
+from whitehat_app.policy_engine import policy_engine
+from whitehat_app.usb_whitelist import usb_whitelist
+
+logger = logging.getLogger(__name__)
+
+
+def agent_config(policy):
+    return dict(policy.config)
+
+
+def parse_since_version(value):
+    """since_version from a query string or payload; None if absent, ValueError if not a version"""
+    if value is None or value == '':
+        return None
+    since_version = int(value)
+    if since_version < 0:
+        raise ValueError(f"negative since_version: {since_version}")
+    return since_version
+
+
+def usb_file_actions(agent_id, files, policy):
+    """Return {relpath: action} for files that should not simply be allowed"""
+    hashes = {
+        file_info['sha256'].lower()
+        for file_info in files
+        if isinstance(file_info, dict) and isinstance(file_info.get('sha256'), str)
+    }
+    verdicts = verdict_index.lookup_many(hashes)
+
+    file_actions, counts, learned = policy.evaluate(files, verdicts)
+
+    # Remember agent-reported detections so the next insertion is decided server-side
+    verdict_index.record(learned, source='agent_vt')
+
+    # One summary line per inventory; per-file logging dominated large scans
+    if counts['quarantine']:
+        logger.warning(f"Files quarantined: agent_id={agent_id}, count={counts['quarantine']}, policy_version={policy.version}")
+    if counts['upload_for_deep_scan']:
+        logger.info(f"Files flagged for deep scan: agent_id={agent_id}, count={counts['upload_for_deep_scan']}, policy_version={policy.version}")
+
+    return file_actions
+
+
+def record_tamper(agent, detail):
+    """Flag the agent as suspicious and open a critical incident"""
+    Agent.objects.filter(agent_id=agent.agent_pk).update(status='suspicious')
+    agent_cache.invalidate(agent.agent_pk)
+    fleet_stats.agents_changed()
+    logger.warning(f"Agent status updated to suspicious: agent_id={agent.agent_pk}, user={agent.user_email}")
+
+    incident = Incident.objects.create(
+        user_id=agent.user_pk,
+        incident_type=f'Tamper Detection: {detail}',
+        severity='CRITICAL'
+    )
+    logger.critical(f"Tamper incident created: incident_id={incident.id}, agent_id={agent.agent_pk}, user={agent.user_email}, detail={detail}")
+    return incident
+
+
+def record_insider_alert(agent, event_type, details):
+    """Store the insider event and open an incident sized by its type"""
+    event = Event.objects.create(
+        user_id=agent.user_pk,
+        event_type=event_type,
+        event_data=details
+    )
+    logger.info(f"Insider event created: event_id={event.id}, agent_id={agent.agent_pk}, type={event_type}")
+
+    severity = 'MEDIUM'
+    if 'bulk_export' in event_type.lower():
+        severity = 'CRITICAL'
+        logger.critical(f"Bulk export detected: agent_id={agent.agent_pk}, user={agent.user_email}")
+
+    incident = Incident.objects.create(
+        user_id=agent.user_pk,
+        incident_type=f'Insider Threat: {event_type}',
+        severity=severity
+    )
+    logger.warning(f"Insider incident created: incident_id={incident.id}, agent_id={agent.agent_pk}, user={agent.user_email}, severity={severity}, type={event_type}")
+    return incident
+
+
+def serialize_command(command):
+    return {
+        'command_id': str(command.id),
+        'type': command.command_type,
+        'payload': command.payload,
+        'created_at': command.created_at.isoformat(),
+    }
+
+
+def run_heartbeat(agent_id, agent, data, ip_address):
+    hostname = data.get('hostname')
+    os_type = data.get('os')
+    user_email = data.get('user_email')
+
+    if not all([hostname, os_type, user_email]):
+        return {'error': 'missing_fields'}, status.HTTP_400_BAD_REQUEST
+
+    try:
+        heartbeat_writer.record(agent_id, user_email, hostname, os_type, ip_address)
+    except UnknownUser:
+        return {'error': 'user_not_found'}, status.HTTP_404_NOT_FOUND
+    return {'status': 'ok', 'file_actions': []}, status.HTTP_200_OK
+
+
+def run_usb_event(agent_id, agent, data, ip_address):
+    files = data.get('files', [])
+    file_actions = usb_file_actions(agent_id, files, policy_engine.get())
+    logger.info(f"USB event processed: agent_id={agent_id}, total_files={len(files)}, actions={len(file_actions)}")
+    return {'default_action': 'allow', 'file_actions': file_actions}, status.HTTP_200_OK
+
+
+def run_tamper(agent_id, agent, data, ip_address):
+    logger.critical(f"TAMPER ALERT from agent_id={agent_id}, detail={data.get('detail')}")
+    record_tamper(agent, data.get('detail'))
+    return {'status': 'ok', 'message': 'Tamper alert recorded'}, status.HTTP_200_OK
+
+
+def run_insider_alert(agent_id, agent, data, ip_address):
+    event_type = data.get('event_type')
+    if not event_type:
+        return {'error': 'missing_event_type'}, status.HTTP_400_BAD_REQUEST
+
+    logger.warning(f"INSIDER THREAT ALERT from agent_id={agent_id}, event_type={event_type}")
+    record_insider_alert(agent, event_type, data.get('details', {}))
+    return {'status': 'ok', 'message': 'Insider alert recorded'}, status.HTTP_200_OK
+
+
+def run_commands(agent_id, agent, data, ip_address):
+    # Batches never long-poll; due commands are claimed immediately
+    commands = command_queue.claim(agent_id)
+    return {'commands': [serialize_command(command) for command in commands]}, status.HTTP_200_OK
+
+
+def run_whitelist(agent_id, agent, data, ip_address):
+    try:
+        since_version = parse_since_version(data.get('since_version'))
+    except (TypeError, ValueError):
+        return {'error': 'invalid_since_version'}, status.HTTP_400_BAD_REQUEST
+    return usb_whitelist.document(agent_id, usb_whitelist.version(agent_id), since_version), status.HTTP_200_OK
+
+
+def run_agent_config(agent_id, agent, data, ip_address):
+    return agent_config(policy_engine.get()), status.HTTP_200_OK
+
+
+# op name -> (handler, needs an existing agent)
+BATCH_OPERATIONS = {
+    'heartbeat': (run_heartbeat, False),
+    'usb-event': (run_usb_event, True),
+    'tamper': (run_tamper, True),
+    'insider-alert': (run_insider_alert, True),
+    'commands': (run_commands, True),
+    'whitelist': (run_whitelist, True),
+    'agent-config': (run_agent_config, True),
+}
+
+
+def run_batch(agent_id, operations, ip_address):
+    """
+    Run batch sub-operations in order inside one transaction.
+
+    Each sub-operation gets its own savepoint, so one failing operation is
+    reported in its result without rolling back the others.
+    """
+    results = []
+
+    with transaction.atomic():
+        agent = agent_cache.get(agent_id)
+
+        for operation in operations:
+            op = operation.get('op')
+            data = operation.get('data') or {}
+            handler, needs_agent = BATCH_OPERATIONS[op]
+
+            if needs_agent and agent is None:
+                results.append({'op': op, 'status': status.HTTP_404_NOT_FOUND, 'body': {'error': 'agent_not_found'}})
+                continue
+
+            try:
+                with transaction.atomic():
+                    body, status_code = handler(agent_id, agent, data, ip_address)
+            except Exception as e:
+                logger.error(f"Batch operation error: agent_id={agent_id}, op={op}, error={str(e)}", exc_info=True)
+                body, status_code = {'error': str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+            # A heartbeat in the batch may have just registered the agent
+            if op == 'heartbeat' and agent is None and status_code == status.HTTP_200_OK:
+                agent = agent_cache.get(agent_id)
+
+            results.append({'op': op, 'status': status_code, 'body': body})
+
+    return results
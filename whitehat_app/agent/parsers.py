@@ -0,0 +1,69 @@
+import gzip
+import io
+import zlib
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError, UnsupportedMediaType
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class PayloadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    def __init__(self, limit):
+        self.detail = {'error': 'payload_too_large', 'max_size': limit}
+
+
+class CompressedJSONParser(JSONParser):
+    """
+    JSON parser that also accepts request bodies sent with
+    Content-Encoding: gzip or zstd.
+
+    Agents compress their largest payloads (usb_event file inventories,
+    offline_queue event lists), which are repetitive JSON and shrink by an
+    order of magnitude. The body is decompressed while it is read from the
+    request stream, and reading stops as soon as the output passes
+    AGENT_MAX_DECOMPRESSED_BODY_SIZE, so a small compressed body cannot
+    expand into an arbitrarily large one in memory. Uncompressed bodies are
+    parsed exactly like JSONParser does.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context.get('request')
+        encoding = request.META.get('HTTP_CONTENT_ENCODING', '').strip().lower() if request else ''
+
+        if encoding in ('', 'identity'):
+            return super().parse(stream, media_type, parser_context)
+
+        if encoding == 'gzip':
+            reader = gzip.GzipFile(fileobj=stream, mode='rb')
+            errors = (OSError, EOFError, zlib.error)
+        elif encoding == 'zstd' and zstandard is not None:
+            reader = zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True, closefd=False)
+            errors = (zstandard.ZstdError,)
+        else:
+            raise UnsupportedMediaType(media_type, detail={'error': 'unsupported_content_encoding', 'encoding': encoding})
+
+        limit = settings.AGENT_MAX_DECOMPRESSED_BODY_SIZE
+        try:
+            data = reader.read(limit + 1)
+        except errors as e:
+            raise ParseError(f"Invalid {encoding} body - {str(e)}")
+        finally:
+            reader.close()
+
+        if len(data) > limit:
+            raise PayloadTooLarge(limit)
+
+        return super().parse(io.BytesIO(data), media_type, parser_context)
+
+
+# DRF's default parsers with JSON swapped for the compression-aware one
+AGENT_PARSER_CLASSES = [CompressedJSONParser, FormParser, MultiPartParser]
@@ -0,0 +1,94 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from whitehat_app.agent_cache import agent_cache
+
+
+class RateLimited(Throttled):
+    """429 with the repo's error body; DRF still sets Retry-After from wait"""
+
+    def __init__(self, wait):
+        self.wait = math.ceil(wait)
+        # Set directly: APIException would coerce retry_after to a string
+        self.detail = {'error': 'rate_limited', 'retry_after': self.wait}
+
+
+class AgentRateThrottle(BaseThrottle):
+    """
+    Token buckets per endpoint scope, so a single agent stuck in a retry
+    loop runs out of tokens without touching the budget of the rest of the
+    fleet.
+
+    Requests for a registered agent are keyed on its agent_id and the
+    client IP together: a fleet behind one NAT address does not share a
+    bucket, and a client that sends another agent's agent_id only drains
+    a bucket of its own. Requests without an agent_id, or naming an
+    unknown one, are keyed on the client IP with the budget times
+    AGENT_RATE_LIMIT_IP_MULTIPLIER. The client IP is
+    REMOTE_ADDR unless NUM_PROXIES says how many trusted proxies append to
+    X-Forwarded-For; otherwise a client could pick its own bucket by
+    sending that header.
+
+    AGENT_RATE_LIMITS maps a scope to (tokens per second, burst). Bucket
+    state lives in the default cache, which is shared between web
+    processes when REDIS_URL is set. Concurrent requests can race between
+    read and write and let a request or two past the budget.
+    """
+
+    scope = 'default'
+
+    def allow_request(self, request, view):
+        if not settings.AGENT_RATE_LIMIT_ENABLED:
+            return True
+
+        rate, burst = settings.AGENT_RATE_LIMITS.get(self.scope, settings.AGENT_RATE_LIMITS['default'])
+        multiplier = settings.AGENT_RATE_LIMIT_IP_MULTIPLIER
+
+        ident = self.get_ident(request)
+        agent_id = self._agent_id(request)
+        if agent_id and agent_cache.get(agent_id) is not None:
+            key = f"throttle:{self.scope}:agent:{agent_id}:{ident}"
+        else:
+            if not ident:
+                return True
+            key = f"throttle:{self.scope}:ip:{ident}"
+            rate, burst = rate * multiplier, burst * multiplier
+
+        cache = caches['default']
+        now = time.time()
+        tokens, updated_at = cache.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        if tokens < 1:
+            raise RateLimited((1 - tokens) / rate)
+
+        # Untouched buckets expire once they would have refilled anyway
+        cache.set(key, (tokens - 1, now), timeout=math.ceil(burst / rate) + 1)
+        return True
+
+    def get_ident(self, request):
+        # Without NUM_PROXIES, X-Forwarded-For is whatever the client sent
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get('REMOTE_ADDR')
+        return super().get_ident(request)
+
+    def _agent_id(self, request):
+        agent_id = request.query_params.get('agent_id')
+        if agent_id:
+            return agent_id
+
+        # Parse errors are raised here rather than swallowed: DRF replaces
+        # request.data with an empty dict after a failed parse
+        data = request.data
+        agent_id = data.get('agent_id') if hasattr(data, 'get') else None
+        return agent_id if isinstance(agent_id, str) else None
+
+
+def agent_throttle(scope):
+    """Throttle class for @throttle_classes with the budget of `scope`"""
+    return type(f"{scope.title().replace('_', '')}RateThrottle", (AgentRateThrottle,), {'scope': scope})
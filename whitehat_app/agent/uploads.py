@@ -0,0 +1,275 @@
+"""
+Upload request/completion shared by the single-file and batch endpoints.
+
+Both functions take a list of per-file payloads and return one result dict
+per entry, in order, using one bulk insert or one bulk update for the
+whole list. The single-file endpoints call them with a one-item list.
+"""
+
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from whitehat_app.fleet_stats import fleet_stats
+from whitehat_app.content_store import content_store, content_object_name, content_hash_for, staging_object_name
+from whitehat_app.hash_verdicts import is_sha256
+from whitehat_app.ids import new_upload_id
+from whitehat_app.models import FileUpload, StoredObject
+from whitehat_app.storage import storage
+from whitehat_app.upload_admission import upload_admission
+from whitehat_app.upload_lifecycle import upload_reaper
+
+logger = logging.getLogger(__name__)
+
+# FileUpload.file_size is a BigIntegerField
+MAX_FILE_SIZE = 2 ** 63 - 1
+
+
+def _parse_file_size(value):
+    """Return file_size as a byte count, or None if it is not one. Form-encoded requests send it as a string"""
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= MAX_FILE_SIZE:
+        return None
+    return value
+
+
+def request_uploads(agent, agent_id, files):
+    """
+    Create FileUpload rows for `files` and return, per file, the upload_id
+    and where to upload it, or an error. Content already stored under the
+    same sha256 is linked instead and answered with skip_upload=True.
+    Transfers the admission limits do not allow yet get no row, only
+    error='upload_deferred' and a retry_after in seconds. A file_size that
+    is not an integer byte count fails only its own entry.
+    """
+    results = [None] * len(files)
+    specs = []
+
+    for index, file_info in enumerate(files):
+        if not isinstance(file_info, dict) or not file_info.get('filename') or file_info.get('file_size') in (None, ''):
+            results[index] = {'success': False, 'error': 'missing_fields'}
+            continue
+
+        file_size = _parse_file_size(file_info['file_size'])
+        if file_size is None:
+            results[index] = {'success': False, 'error': 'invalid_file_size'}
+            continue
+
+        filename = file_info['filename']
+        metadata = file_info.get('metadata') or {}
+        # Support both old and new parameter names
+        file_hash = file_info.get('file_hash') or metadata.get('hash', '')
+        sha256 = file_hash.lower() if isinstance(file_hash, str) else ''
+
+        specs.append({
+            'index': index,
+            'filename': filename,
+            'file_size': file_size,
+            'file_path': file_info.get('file_path') or metadata.get('original_path') or filename,
+            'file_hash': file_hash,
+            'category': file_info.get('category', 'unknown'),
+            'sha256': sha256 if is_sha256(sha256) else None,
+        })
+
+    stored_objects = content_store.find_many({spec['sha256'] for spec in specs if spec['sha256']})
+
+    transfers = [spec for spec in specs if spec['sha256'] not in stored_objects]
+    decisions = upload_admission.admit(agent.agent_pk, [spec['file_size'] for spec in transfers])
+    deferred = 0
+    for spec, retry_after in zip(transfers, decisions):
+        if retry_after is not None:
+            spec['retry_after'] = retry_after
+            deferred += 1
+
+    rows = []
+    for spec in specs:
+        if 'retry_after' in spec:
+            results[spec['index']] = {'success': False, 'error': 'upload_deferred', 'retry_after': spec['retry_after']}
+            continue
+
+        upload_id = new_upload_id()
+        sha256 = spec['sha256']
+
+        # Uploads with a sha256 are content-addressed and stored once
+        if sha256:
+            object_name = content_object_name(sha256)
+        else:
+            object_name = f"agents/{agent_id}/{spec['category']}/{spec['filename']}"
+
+        # Direct uploads bypass the proxy's hash check, so content-addressed
+        # bytes are staged until completion has verified them
+        upload_target = object_name
+        if storage.presigned and sha256:
+            upload_target = staging_object_name(upload_id)
+
+        presigned_url = storage.get_upload_url(upload_target)
+        if not presigned_url:
+            logger.error(f"Failed to generate presigned URL for upload_id={upload_id}, agent_id={agent_id}")
+            results[spec['index']] = {'upload_id': upload_id, 'success': False, 'error': 'connection_error'}
+            continue
+
+        upload = FileUpload(
+            upload_id=upload_id,
+            agent_id=agent.agent_pk,
+            file_path=spec['file_path'],
+            file_size=spec['file_size'],
+            file_hash=spec['file_hash'],
+            minio_url=presigned_url,
+            bucket=storage.bucket,
+            object_name=object_name,
+            status='pending'
+        )
+        # presigned_url is kept for agents that do not know skip_upload;
+        # re-uploading the same content is harmless
+        result = {'upload_id': upload_id, 'presigned_url': presigned_url, 'skip_upload': False}
+
+        stored = stored_objects.get(sha256) if sha256 else None
+        if stored is not None:
+            upload.bucket = stored.bucket
+            upload.object_name = stored.object_name
+            upload.stored_object_id = stored.sha256
+            upload.deduplicated = True
+            upload.status = 'completed'
+            upload.completed_at = upload.finished_at = timezone.now()
+            upload.scan_status = 'queued'
+            result['skip_upload'] = True
+        elif storage.presigned:
+            upload_form = storage.get_upload_form(upload_target, spec['file_size'])
+            if upload_form:
+                result['upload_form'] = upload_form
+
+        rows.append(upload)
+        results[spec['index']] = result
+
+    with transaction.atomic():
+        FileUpload.objects.bulk_create(rows)
+        fleet_stats.uploads_changed(Counter((None, upload.status) for upload in rows))
+    upload_reaper.ensure_running()
+
+    deduplicated = sum(1 for upload in rows if upload.deduplicated)
+    logger.info(f"Upload requests created: agent_id={agent_id}, count={len(rows)}, deduplicated={deduplicated}, deferred={deferred}")
+
+    return results
+
+
+def complete_uploads(agent_id, completions):
+    """
+    Record the agent's outcome for each {'upload_id', 'success', 'error'}
+    and return {'upload_id', 'success'[, 'error']} per entry.
+    Content-addressed uploads are only completed once their content has
+    been verified against the hash. Completed uploads are queued for the
+    deep scan.
+
+    Verification reads the whole object, so one call verifies at most
+    AGENT_UPLOAD_VERIFY_MAX_BYTES (and always at least one upload); the
+    rest stay pending and are answered error='verification_deferred' with
+    a retry_after, to be completed in a later call. An upload_id repeated
+    within the call is only recorded for its first entry.
+    """
+    upload_ids = [
+        completion.get('upload_id')
+        for completion in completions
+        if isinstance(completion, dict) and completion.get('upload_id')
+    ]
+    uploads = FileUpload.objects.in_bulk(upload_ids)
+
+    hashes = {content_hash_for(upload.object_name) for upload in uploads.values()} - {None}
+    stored_objects = StoredObject.objects.in_bulk(list(hashes))
+
+    results = []
+    changed = []
+    seen = set()
+    verify_bytes = 0
+    now = timezone.now()
+
+    for completion in completions:
+        upload_id = completion.get('upload_id') if isinstance(completion, dict) else None
+        if not upload_id:
+            results.append({'upload_id': upload_id, 'success': False, 'error': 'missing_upload_id'})
+            continue
+
+        if upload_id in seen:
+            results.append({'upload_id': upload_id, 'success': False, 'error': 'duplicate_upload_id'})
+            continue
+        seen.add(upload_id)
+
+        file_upload = uploads.get(upload_id)
+        if file_upload is None:
+            logger.error(f"Upload not found: upload_id={upload_id}, agent_id={agent_id}")
+            results.append({'upload_id': upload_id, 'success': False, 'error': 'upload_not_found'})
+            continue
+
+        sha256 = content_hash_for(file_upload.object_name)
+        staged_name = staging_object_name(upload_id) if storage.presigned and sha256 else None
+
+        if file_upload.deduplicated:
+            # Linked to already stored content at request time; drop any
+            # redundant direct upload from agents that ignore skip_upload
+            if staged_name:
+                storage.remove_object(staged_name)
+            results.append({'upload_id': upload_id, 'success': True})
+            continue
+
+        success = completion.get('success', False)
+        error = completion.get('error')
+
+        if success and sha256:
+            stored = stored_objects.get(sha256)
+            if stored is None:
+                if verify_bytes and verify_bytes + file_upload.file_size > settings.AGENT_UPLOAD_VERIFY_MAX_BYTES:
+                    results.append({'upload_id': upload_id, 'success': False, 'error': 'verification_deferred', 'retry_after': 1})
+                    continue
+                verify_bytes += file_upload.file_size
+
+                stored = content_store.verify(
+                    sha256, file_upload.bucket, file_upload.object_name, staged_name, max_size=file_upload.file_size
+                )
+                if stored is not None:
+                    stored_objects[sha256] = stored
+            elif staged_name:
+                storage.remove_object(staged_name)
+
+            if stored is None:
+                success = False
+                error = 'hash_mismatch'
+            else:
+                file_upload.stored_object_id = stored.sha256
+
+        if success:
+            # Agent reports successful upload
+            file_upload.status = 'completed'
+            file_upload.completed_at = now
+            file_upload.finished_at = now
+            file_upload.scan_status = 'queued'
+            results.append({'upload_id': upload_id, 'success': True})
+        else:
+            # Agent reports failed upload
+            file_upload.status = 'failed'
+            file_upload.error_message = error or 'Unknown error'
+            file_upload.finished_at = now
+            logger.error(f"Upload failed: upload_id={upload_id}, agent_id={agent_id}, error={error}")
+            results.append({'upload_id': upload_id, 'success': False, 'error': error or 'upload_failed'})
+
+        changed.append(file_upload)
+
+    with transaction.atomic():
+        # Count transitions from the status under lock: the reaper or a
+        # concurrent completion may have moved these uploads since they were read
+        current = dict(
+            FileUpload.objects.select_for_update()
+            .filter(upload_id__in=[upload.upload_id for upload in changed])
+            .order_by('upload_id')
+            .values_list('upload_id', 'status')
+        )
+        changed = [upload for upload in changed if upload.upload_id in current]
+        FileUpload.objects.bulk_update(changed, ['status', 'completed_at', 'finished_at', 'error_message', 'stored_object', 'scan_status'])
+        fleet_stats.uploads_changed(Counter((current[upload.upload_id], upload.status) for upload in changed))
+
+    completed = sum(1 for upload in changed if upload.status == 'completed')
+    logger.info(f"Upload completions recorded: agent_id={agent_id}, completed={completed}, failed={len(changed) - completed}")
+
+    return results
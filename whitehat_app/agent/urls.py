@@ -7,13 +7,16 @@ Endpoints:
 - /heartbeat: Agent status check and registration (POST)
 - /upload/request: Request presigned URL for file upload (POST)
 - /upload/complete: Confirm file upload completion (POST)
+- /upload/request-batch, /upload/complete-batch: The same for many files at once (POST)
 - /offline-queue: Submit offline events queue (POST)
-- /commands: Retrieve pending commands for agent (GET)
-- /whitelist: Get USB device whitelist (GET)
-- /agent-config: Get agent configuration settings (GET)
+- /commands: Retrieve pending commands for agent, optionally long-polling (GET)
+- /commands/ack: Acknowledge a delivered command (POST)
+- /whitelist: Get USB device whitelist, or the changes since_version; ETag/304 (GET)
+- /agent-config: Get agent configuration settings; ETag/304 (GET)
 - /usb-event: Report USB insertion event and get file policies (POST)
 - /tamper: Report tamper detection alert (POST)
 - /insider-alert: Report insider threat alert (POST)
+- /batch: Run several of the above agent operations in one request (POST)
 """
 
 from django.urls import path
@@ -31,10 +34,13 @@ urlpatterns = [
     # File upload management
     path('upload/request', views.request_upload, name='agent_upload_request'),  # Request upload URL
     path('upload/complete', views.complete_upload, name='agent_upload_complete'),  # Confirm upload
+    path('upload/request-batch', views.request_upload_batch, name='agent_upload_request_batch'),  # Request several upload URLs
+    path('upload/complete-batch', views.complete_upload_batch, name='agent_upload_complete_batch'),  # Confirm several uploads
 
     # Event and command management
     path('offline-queue', views.offline_queue, name='agent_offline_queue'),  # Submit offline events
-    path('commands', views.get_commands, name='agent_commands'),  # Get pending commands
+    path('commands', views.get_commands, name='agent_commands'),  # Get pending commands (long-poll)
+    path('commands/ack', views.acknowledge_command, name='agent_command_ack'),  # Acknowledge command
 
     # Configuration and policies
     path('whitelist', views.get_whitelist, name='agent_whitelist'),  # USB whitelist
@@ -45,6 +51,9 @@ urlpatterns = [
     path('tamper', views.tamper_alert, name='agent_tamper'),  # Tamper detection
     path('insider-alert', views.insider_alert, name='agent_insider_alert'),  # Insider threat
 
+    # Multiplexed agent operations
+    path('batch', views.agent_batch, name='agent_batch'),  # Several operations, one request
+
     # ============================================================================
     # API Endpoints for Agent Management (GET requests for monitoring/dashboard)
     # ============================================================================
@@ -52,10 +61,13 @@ urlpatterns = [
     # Agent management endpoints
     path('list', views.list_agents, name='agent_list'),  # Get all agents
     path('<str:agent_id>/detail', views.get_agent_detail, name='agent_detail'),  # Get agent details
+    path('<str:agent_id>/uptime', views.get_agent_uptime, name='agent_uptime'),  # Get agent uptime timeline
+    path('<str:agent_id>/commands', views.enqueue_command, name='agent_command_enqueue'),  # Queue a command
     path('statistics', views.agent_statistics, name='agent_statistics'),  # Get agent statistics
 
     # File upload monitoring endpoints
     path('uploads/list', views.list_file_uploads, name='agent_uploads_list'),  # Get all uploads
+    path('uploads/metrics', views.upload_pipeline_metrics, name='agent_uploads_metrics'),  # Upload throughput/latency
     path('uploads/<str:upload_id>/detail', views.get_file_upload_detail, name='agent_upload_detail'),  # Get upload details
 
     # Offline events monitoring endpoints
@@ -1,22 +1,47 @@
+import math
 import time
+import uuid
 import logging
 from datetime import datetime, timedelta
-from django.utils import timezone
+from adrf.decorators import api_view
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.decorators import parser_classes, permission_classes, throttle_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 
 from whitehat_app.models import Agent, FileUpload, OfflineEvent, User, Incident, Event
-from whitehat_app.minio_service import minio_service
-from whitehat_app.serializers import AgentSerializer, FileUploadSerializer, OfflineEventSerializer
+from whitehat_app.agent_cache import agent_cache
+from whitehat_app.agent_liveness import agent_liveness
+from whitehat_app.command_queue import command_queue
+from whitehat_app.agent.uploads import request_uploads, complete_uploads
+from whitehat_app.agent.parsers import AGENT_PARSER_CLASSES
+from whitehat_app.agent.throttling import agent_throttle
+from whitehat_app.agent.operations import (
+    BATCH_OPERATIONS, agent_config, parse_since_version, usb_file_actions,
+    record_tamper, record_insider_alert, serialize_command, run_batch
+)
+from whitehat_app.fleet_stats import fleet_stats
+from whitehat_app.heartbeat_writer import UnknownUser, heartbeat_writer
+from whitehat_app.ids import new_upload_id
+from whitehat_app.pagination import KEYSET_PAGINATION_PARAMETERS, InvalidCursor, KeysetPagination, keyset_page_schema
+from whitehat_app.upload_lifecycle import upload_metrics
+from whitehat_app.policy_engine import policy_engine
+from whitehat_app.storage import storage
+from whitehat_app.usb_whitelist import usb_whitelist
+from whitehat_app.serializers import AgentSerializer, FileUploadSerializer, OfflineEventSerializer, AgentCommandSerializer
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# OfflineEvent.timestamp is a BigIntegerField
+MAX_EVENT_TIMESTAMP = 2 ** 63 - 1
+
 
 @extend_schema(
     request={
@@ -35,7 +60,9 @@ logger = logging.getLogger(__name__)
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
-def heartbeat(request):
+@throttle_classes([agent_throttle('heartbeat')])
+@parser_classes(AGENT_PARSER_CLASSES)
+async def heartbeat(request):
     try:
         data = request.data
         agent_id = data.get('agent_id')
@@ -52,30 +79,26 @@ def heartbeat(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Buffered and flushed in the background; only new agents are written through
         try:
-            user = User.objects.get(email=user_email)
-        except User.DoesNotExist:
+            created = await heartbeat_writer.arecord(
+                agent_id=agent_id,
+                user_email=user_email,
+                hostname=hostname,
+                os_type=os_type,
+                ip_address=request.META.get('REMOTE_ADDR'),
+            )
+        except UnknownUser:
             logger.error(f"User not found for email={user_email} in heartbeat from agent_id={agent_id}")
             return Response(
                 {'error': 'user_not_found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        agent, created = Agent.objects.update_or_create(
-            agent_id=agent_id,
-            defaults={
-                'user': user,
-                'hostname': hostname,
-                'os_type': os_type,
-                'status': 'online',
-                'ip_address': request.META.get('REMOTE_ADDR'),
-            }
-        )
-
         if created:
-            logger.info(f"New agent created: agent_id={agent_id}, hostname={hostname}, user={user.email}")
+            logger.info(f"New agent created: agent_id={agent_id}, hostname={hostname}, user={user_email}")
         else:
-            logger.debug(f"Agent updated: agent_id={agent_id}, status=online, ip={request.META.get('REMOTE_ADDR')}")
+            logger.debug(f"Agent heartbeat buffered: agent_id={agent_id}, status=online, ip={request.META.get('REMOTE_ADDR')}")
 
         file_actions = []
 
@@ -113,7 +136,24 @@ def heartbeat(request):
                         'type': 'object',
                         'properties': {
                             'upload_id': {'type': 'string'},
-                            'upload_url': {'type': 'string'}
+                            'upload_url': {'type': 'string'},
+                            'skip_upload': {'type': 'boolean', 'description': 'Content with this file_hash is already stored; no transfer needed'},
+                            'upload_form': {'type': 'object', 'description': 'Presigned POST url and fields binding size and content type (presigned mode only)'}
+                        }
+                    }
+                }
+            }
+        },
+        503: {
+            'description': 'Upload deferred by admission control; retry after retry_after seconds (also sent as Retry-After)',
+            'content': {
+                'application/json': {
+                    'schema': {
+                        'type': 'object',
+                        'properties': {
+                            'success': {'type': 'boolean'},
+                            'error': {'type': 'string', 'enum': ['upload_deferred']},
+                            'retry_after': {'type': 'integer'}
                         }
                     }
                 }
@@ -124,78 +164,55 @@ def heartbeat(request):
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
-def request_upload(request):
+@throttle_classes([agent_throttle('upload')])
+@parser_classes(AGENT_PARSER_CLASSES)
+async def request_upload(request):
     try:
         data = request.data
         agent_id = data.get('agent_id')
         filename = data.get('filename')
         file_size = data.get('file_size')
         category = data.get('category', 'unknown')
-        metadata = data.get('metadata', {})
-
-        # Support both old and new parameter names
-        file_path = data.get('file_path') or metadata.get('original_path') or filename
-        file_hash = data.get('file_hash') or metadata.get('hash', '')
 
         logger.info(f"Upload request from agent_id={agent_id}, filename={filename}, size={file_size}, category={category}")
 
-        if not all([agent_id, filename, file_size]):
+        if not all([agent_id, filename]) or file_size in (None, ''):
             logger.warning(f"Upload request missing fields: agent_id={agent_id}, filename={filename}, file_size={file_size}")
             return Response(
                 {'error': 'missing_fields'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            agent = Agent.objects.get(agent_id=agent_id)
-        except Agent.DoesNotExist:
+        agent = await agent_cache.aget(agent_id)
+        if agent is None:
             logger.error(f"Agent not found for upload request: agent_id={agent_id}")
             return Response(
                 {'error': 'agent_not_found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        upload_id = f"upload_{agent_id}_{int(time.time())}"
-        object_name = f"agents/{agent_id}/{category}/{filename}"
+        [result] = await sync_to_async(request_uploads)(agent, agent_id, [data])
+
+        if result.get('error') == 'invalid_file_size':
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
 
-        logger.debug(f"Generating presigned URL for upload_id={upload_id}, object_name={object_name}")
-        presigned_url = minio_service.get_upload_url(object_name)
+        if result.get('error') == 'connection_error':
+            return Response(result, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        if not presigned_url:
-            logger.error(f"Failed to generate presigned URL for upload_id={upload_id}, agent_id={agent_id}")
+        if result.get('error') == 'upload_deferred':
             return Response(
-                {
-                    'upload_id': upload_id,
-                    'success': False,
-                    'error': 'connection_error'
-                },
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                result,
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(result['retry_after'])}
             )
 
-        FileUpload.objects.create(
-            upload_id=upload_id,
-            agent=agent,
-            file_path=file_path,
-            file_size=file_size,
-            file_hash=file_hash,
-            minio_url=presigned_url,
-            bucket=minio_service.bucket,
-            object_name=object_name,
-            status='pending'
-        )
-
-        logger.info(f"Upload request created: upload_id={upload_id}, agent_id={agent_id}, hash={file_hash[:16]}...")
-
-        return Response({
-            'upload_id': upload_id,
-            'presigned_url': presigned_url
-        }, status=status.HTTP_200_OK)
+        return Response(result, status=status.HTTP_200_OK)
 
     except Exception as e:
         logger.error(f"Upload request error: {str(e)}", exc_info=True)
         return Response(
             {
-                'upload_id': f"upload_{int(time.time())}",
+                'upload_id': new_upload_id(),
                 'success': False,
                 'error': str(e)
             },
@@ -232,13 +249,14 @@ def request_upload(request):
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
-def complete_upload(request):
+@throttle_classes([agent_throttle('upload')])
+@parser_classes(AGENT_PARSER_CLASSES)
+async def complete_upload(request):
     try:
         data = request.data
         agent_id = data.get('agent_id')
         upload_id = data.get('upload_id')
         success = data.get('success', False)
-        error = data.get('error')
 
         logger.info(f"Upload completion from agent_id={agent_id}, upload_id={upload_id}, success={success}")
 
@@ -253,44 +271,12 @@ def complete_upload(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            file_upload = FileUpload.objects.get(upload_id=upload_id)
-        except FileUpload.DoesNotExist:
-            logger.error(f"Upload not found: upload_id={upload_id}, agent_id={agent_id}")
-            return Response(
-                {
-                    'upload_id': upload_id,
-                    'success': False,
-                    'error': 'upload_not_found'
-                },
-                status=status.HTTP_404_NOT_FOUND
-            )
+        [result] = await sync_to_async(complete_uploads)(agent_id, [data])
 
-        if success:
-            # Agent reports successful upload
-            file_upload.status = 'completed'
-            file_upload.completed_at = timezone.now()
-            file_upload.save()
-
-            logger.info(f"Upload completed successfully: upload_id={upload_id}, agent_id={agent_id}, file_path={file_upload.file_path}")
-
-            return Response({
-                'upload_id': upload_id,
-                'success': True
-            }, status=status.HTTP_200_OK)
-        else:
-            # Agent reports failed upload
-            file_upload.status = 'failed'
-            file_upload.error_message = error or 'Unknown error'
-            file_upload.save()
+        if result.get('error') == 'upload_not_found':
+            return Response(result, status=status.HTTP_404_NOT_FOUND)
 
-            logger.error(f"Upload failed: upload_id={upload_id}, agent_id={agent_id}, error={error}")
-
-            return Response({
-                'upload_id': upload_id,
-                'success': False,
-                'error': error or 'upload_failed'
-            }, status=status.HTTP_200_OK)
+        return Response(result, status=status.HTTP_200_OK)
 
     except Exception as e:
         logger.error(f"Upload completion error: upload_id={upload_id if 'upload_id' in locals() else 'unknown'}, error={str(e)}", exc_info=True)
@@ -309,11 +295,253 @@ def complete_upload(request):
         'application/json': {
             'type': 'object',
             'properties': {
+                'agent_id': {'type': 'string'},
+                'files': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'filename': {'type': 'string'},
+                            'file_path': {'type': 'string'},
+                            'file_size': {'type': 'integer'},
+                            'file_hash': {'type': 'string'},
+                            'category': {'type': 'string'}
+                        }
+                    }
+                }
+            }
+        }
+    },
+    responses={200: {'description': 'One upload_id and upload URL (or error) per file, in request order'}}
+)
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([agent_throttle('upload')])
+@parser_classes(AGENT_PARSER_CLASSES)
+async def request_upload_batch(request):
+    """Request upload URLs for several files with one agent lookup and one insert"""
+    try:
+        data = request.data
+        agent_id = data.get('agent_id')
+        files = data.get('files', [])
+
+        if not agent_id or not isinstance(files, list) or not files:
+            logger.warning(f"Batch upload request missing fields: agent_id={agent_id}")
+            return Response(
+                {'error': 'missing_fields'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(files) > settings.AGENT_UPLOAD_BATCH_MAX_FILES:
+            return Response(
+                {'error': 'too_many_files', 'max_files': settings.AGENT_UPLOAD_BATCH_MAX_FILES},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        agent = await agent_cache.aget(agent_id)
+        if agent is None:
+            logger.error(f"Agent not found for batch upload request: agent_id={agent_id}")
+            return Response(
+                {'error': 'agent_not_found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        logger.info(f"Batch upload request from agent_id={agent_id}, files={len(files)}")
+
+        uploads = await sync_to_async(request_uploads)(agent, agent_id, files)
+
+        return Response({
+            'uploads': uploads
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Batch upload request error: agent_id={agent_id if 'agent_id' in locals() else 'unknown'}, error={str(e)}", exc_info=True)
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@extend_schema(
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'agent_id': {'type': 'string'},
+                'uploads': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'upload_id': {'type': 'string'},
+                            'success': {'type': 'boolean'},
+                            'error': {'type': 'string'}
+                        }
+                    }
+                }
+            }
+        }
+    },
+    responses={200: {'description': 'One completion result per upload, in request order'}}
+)
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([agent_throttle('upload')])
+@parser_classes(AGENT_PARSER_CLASSES)
+async def complete_upload_batch(request):
+    """Confirm several uploads with one lookup and one bulk status update"""
+    try:
+        data = request.data
+        agent_id = data.get('agent_id')
+        uploads = data.get('uploads', [])
+
+        if not isinstance(uploads, list) or not uploads:
+            logger.warning(f"Batch upload completion missing uploads from agent_id={agent_id}")
+            return Response(
+                {'error': 'missing_uploads'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(uploads) > settings.AGENT_UPLOAD_BATCH_MAX_FILES:
+            return Response(
+                {'error': 'too_many_files', 'max_files': settings.AGENT_UPLOAD_BATCH_MAX_FILES},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        logger.info(f"Batch upload completion from agent_id={agent_id}, uploads={len(uploads)}")
+
+        results = await sync_to_async(complete_uploads)(agent_id, uploads)
+
+        return Response({
+            'uploads': results
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Batch upload completion error: agent_id={agent_id if 'agent_id' in locals() else 'unknown'}, error={str(e)}", exc_info=True)
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def _validate_offline_events(events):
+    """Validate an offline queue batch up front.
+
+    Returns (rows, errors) where rows are normalized event dicts and errors
+    lists the offending indexes. A batch with any error is rejected whole.
+    """
+    rows = []
+    errors = []
+    now = int(time.time())
+
+    for index, event in enumerate(events):
+        if not isinstance(event, dict):
+            errors.append({'index': index, 'error': 'invalid_event'})
+            continue
+
+        event_type = event.get('type')
+        payload = event.get('payload', {})
+        timestamp = event.get('timestamp', now)
+        client_event_id = event.get('event_id')
+
+        if not isinstance(event_type, str) or not event_type or len(event_type) > 50:
+            errors.append({'index': index, 'error': 'invalid_type'})
+        elif not isinstance(payload, dict):
+            errors.append({'index': index, 'error': 'invalid_payload'})
+        elif (isinstance(timestamp, bool) or not isinstance(timestamp, (int, float)) or not math.isfinite(timestamp)
+              or abs(timestamp) > MAX_EVENT_TIMESTAMP):
+            errors.append({'index': index, 'error': 'invalid_timestamp'})
+        elif client_event_id is not None and (not isinstance(client_event_id, str) or not client_event_id or len(client_event_id) > 64):
+            errors.append({'index': index, 'error': 'invalid_event_id'})
+        else:
+            rows.append({
+                'event_type': event_type,
+                'payload': payload,
+                'timestamp': int(timestamp),
+                'client_event_id': client_event_id,
+            })
+
+    return rows, errors
+
+
+def _store_offline_events(agent_pk, rows):
+    """
+    Write validated offline events in chunked bulk inserts.
+
+    Runs synchronously because the whole batch shares one transaction.
+    Returns the number of events stored; the rest were duplicates.
+    """
+    # Collapse repeats of the same client id inside the batch itself
+    seen_ids = set()
+    unique_rows = []
+    for row in rows:
+        client_event_id = row['client_event_id']
+        if client_event_id is not None:
+            if client_event_id in seen_ids:
+                continue
+            seen_ids.add(client_event_id)
+        unique_rows.append(row)
+
+    batch_size = settings.AGENT_OFFLINE_QUEUE_BATCH_SIZE
+    queued = 0
+
+    with transaction.atomic():
+        for start in range(0, len(unique_rows), batch_size):
+            chunk = unique_rows[start:start + batch_size]
+
+            # Drop events already stored by an earlier (retried) submission
+            chunk_ids = [row['client_event_id'] for row in chunk if row['client_event_id'] is not None]
+            existing_ids = set()
+            if chunk_ids:
+                existing_ids = set(
+                    OfflineEvent.objects.filter(
+                        agent_id=agent_pk,
+                        client_event_id__in=chunk_ids
+                    ).values_list('client_event_id', flat=True)
+                )
+
+            while True:
+                new_events = [
+                    OfflineEvent(agent_id=agent_pk, **row)
+                    for row in chunk
+                    if row['client_event_id'] not in existing_ids
+                ]
+                try:
+                    with transaction.atomic():
+                        OfflineEvent.objects.bulk_create(new_events)
+                    break
+                except IntegrityError:
+                    # A concurrent retry stored some of these events first; drop
+                    # them and insert the rest, so queued counts only our rows
+                    stored_ids = set(
+                        OfflineEvent.objects.filter(
+                            agent_id=agent_pk,
+                            client_event_id__in=chunk_ids
+                        ).values_list('client_event_id', flat=True)
+                    )
+                    if stored_ids <= existing_ids:
+                        raise
+                    existing_ids = stored_ids
+
+            queued += len(new_events)
+
+    return queued
+
+
+@extend_schema(
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'agent_id': {'type': 'string'},
                 'events': {
                     'type': 'array',
                     'items': {
                         'type': 'object',
                         'properties': {
+                            'event_id': {'type': 'string'},
                             'type': {'type': 'string'},
                             'payload': {'type': 'object'},
                             'timestamp': {'type': 'integer'}
@@ -328,12 +556,21 @@ def complete_upload(request):
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
-def offline_queue(request):
+@throttle_classes([agent_throttle('offline_queue')])
+@parser_classes(AGENT_PARSER_CLASSES)
+async def offline_queue(request):
     try:
         data = request.data
         events = data.get('events', [])
         agent_id = data.get('agent_id')
 
+        if not isinstance(events, list):
+            logger.warning(f"Offline queue events is not a list: agent_id={agent_id}")
+            return Response(
+                {'error': 'invalid_events'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         logger.info(f"Offline queue submission from agent_id={agent_id}, event_count={len(events)}")
 
         if not agent_id:
@@ -343,29 +580,38 @@ def offline_queue(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            agent = Agent.objects.get(agent_id=agent_id)
-        except Agent.DoesNotExist:
+        if len(events) > settings.AGENT_OFFLINE_QUEUE_MAX_EVENTS:
+            logger.warning(f"Offline queue too large: agent_id={agent_id}, event_count={len(events)}")
+            return Response(
+                {'error': 'too_many_events', 'max_events': settings.AGENT_OFFLINE_QUEUE_MAX_EVENTS},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows, errors = _validate_offline_events(events)
+        if errors:
+            logger.warning(f"Offline queue rejected: agent_id={agent_id}, invalid_events={len(errors)}")
+            return Response(
+                {'error': 'invalid_events', 'details': errors[:100]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        agent = await agent_cache.aget(agent_id)
+        if agent is None:
             logger.error(f"Agent not found for offline queue: agent_id={agent_id}")
             return Response(
                 {'error': 'agent_not_found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        for event in events:
-            OfflineEvent.objects.create(
-                agent=agent,
-                event_type=event.get('type'),
-                payload=event.get('payload', {}),
-                timestamp=event.get('timestamp', int(time.time()))
-            )
-            logger.debug(f"Offline event queued: agent_id={agent_id}, type={event.get('type')}")
+        queued = await sync_to_async(_store_offline_events)(agent.agent_pk, rows)
 
-        logger.info(f"Offline events queued successfully: agent_id={agent_id}, count={len(events)}")
+        duplicates = len(rows) - queued
+        logger.info(f"Offline events queued successfully: agent_id={agent_id}, count={queued}, duplicates={duplicates}")
 
         return Response({
             'status': 'ok',
-            'queued': len(events)
+            'queued': queued,
+            'duplicates': duplicates
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
@@ -384,6 +630,13 @@ def offline_queue(request):
             location=OpenApiParameter.QUERY,
             required=True,
             description='Agent ID to retrieve commands for'
+        ),
+        OpenApiParameter(
+            name='wait',
+            type=OpenApiTypes.NUMBER,
+            location=OpenApiParameter.QUERY,
+            required=False,
+            description='Seconds to hold the request until a command arrives (long-poll, default 0)'
         )
     ],
     responses={200: {'description': 'Agent commands retrieved'}}
@@ -391,8 +644,9 @@ def offline_queue(request):
 @csrf_exempt
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def get_commands(request):
-    """Get pending commands for an agent"""
+@throttle_classes([agent_throttle('commands')])
+async def get_commands(request):
+    """Get pending commands for an agent, optionally long-polling until one arrives"""
     try:
         agent_id = request.query_params.get('agent_id')
 
@@ -405,11 +659,30 @@ def get_commands(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # For now, return empty commands list
-        # Future: implement AgentCommand model and retrieve pending commands
-        logger.debug(f"Returning empty commands list for agent_id={agent_id}")
+        try:
+            wait = float(request.query_params.get('wait', 0))
+        except ValueError:
+            wait = math.nan
+        if not math.isfinite(wait):
+            return Response(
+                {'error': 'invalid_wait'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        wait = min(max(wait, 0), settings.AGENT_COMMAND_LONG_POLL_TIMEOUT)
+
+        agent = await agent_cache.aget(agent_id)
+        if agent is None:
+            logger.error(f"Agent not found for command request: agent_id={agent_id}")
+            return Response(
+                {'error': 'agent_not_found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        commands = await command_queue.poll(agent_id, wait)
+
+        logger.debug(f"Returning {len(commands)} commands for agent_id={agent_id}")
         return Response({
-            'commands': []
+            'commands': [serialize_command(command) for command in commands]
         }, status=status.HTTP_200_OK)
 
     except Exception as e:
@@ -420,6 +693,87 @@ def get_commands(request):
         )
 
 
+@extend_schema(
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'agent_id': {'type': 'string'},
+                'command_id': {'type': 'string'},
+                'success': {'type': 'boolean'},
+                'result': {'type': 'object'},
+                'error': {'type': 'string'}
+            }
+        }
+    },
+    responses={200: {'description': 'Command acknowledged'}}
+)
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([agent_throttle('commands')])
+@parser_classes(AGENT_PARSER_CLASSES)
+async def acknowledge_command(request):
+    """Record the outcome of a delivered command"""
+    try:
+        data = request.data
+        agent_id = data.get('agent_id')
+        command_id = data.get('command_id')
+        success = data.get('success', False)
+
+        logger.info(f"Command acknowledgement from agent_id={agent_id}, command_id={command_id}, success={success}")
+
+        if not all([agent_id, command_id]):
+            logger.warning(f"Command acknowledgement missing fields: agent_id={agent_id}, command_id={command_id}")
+            return Response(
+                {'error': 'missing_fields'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            command_id = uuid.UUID(str(command_id))
+        except ValueError:
+            return Response(
+                {'error': 'invalid_command_id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        acknowledged = await sync_to_async(command_queue.acknowledge)(
+            agent_id,
+            command_id,
+            success,
+            result=data.get('result'),
+            error=data.get('error'),
+        )
+        if not acknowledged:
+            logger.error(f"Command not found: command_id={command_id}, agent_id={agent_id}")
+            return Response(
+                {'error': 'command_not_found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response({
+            'command_id': str(command_id),
+            'status': 'ok'
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Command acknowledgement error: agent_id={agent_id if 'agent_id' in locals() else 'unknown'}, error={str(e)}", exc_info=True)
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def _not_modified(request, etag):
+    """True if If-None-Match already names the current version of a document"""
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is None:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
 @extend_schema(
     parameters=[
         OpenApiParameter(
@@ -428,14 +782,25 @@ def get_commands(request):
             location=OpenApiParameter.QUERY,
             required=True,
             description='Agent ID to retrieve whitelist for'
+        ),
+        OpenApiParameter(
+            name='since_version',
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.QUERY,
+            required=False,
+            description='Whitelist version the agent already has; only added and removed devices are returned'
         )
     ],
-    responses={200: {'description': 'Whitelist retrieved'}}
+    responses={
+        200: {'description': 'Whitelist retrieved'},
+        304: {'description': 'Whitelist unchanged since the ETag sent in If-None-Match'}
+    }
 )
 @csrf_exempt
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def get_whitelist(request):
+@throttle_classes([agent_throttle('config')])
+async def get_whitelist(request):
     """Get USB device whitelist for an agent"""
     try:
         agent_id = request.query_params.get('agent_id')
@@ -449,12 +814,22 @@ def get_whitelist(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # For now, return empty whitelist
-        # Future: implement UsbWhitelist model
-        logger.debug(f"Returning empty whitelist for agent_id={agent_id}")
-        return Response({
-            'devices': []
-        }, status=status.HTTP_200_OK)
+        try:
+            since_version = parse_since_version(request.query_params.get('since_version'))
+        except ValueError:
+            return Response(
+                {'error': 'invalid_since_version'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        version = await sync_to_async(usb_whitelist.version)(agent_id)
+        etag = usb_whitelist.etag(version)
+        if _not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        document = await sync_to_async(usb_whitelist.document)(agent_id, version, since_version)
+        logger.debug(f"Returning whitelist version={version} since_version={since_version} for agent_id={agent_id}")
+        return Response(document, status=status.HTTP_200_OK, headers={'ETag': etag})
 
     except Exception as e:
         logger.error(f"Get whitelist error: agent_id={agent_id if 'agent_id' in locals() else 'unknown'}, error={str(e)}", exc_info=True)
@@ -474,12 +849,16 @@ def get_whitelist(request):
             description='Agent ID to retrieve configuration for'
         )
     ],
-    responses={200: {'description': 'Agent configuration retrieved'}}
+    responses={
+        200: {'description': 'Agent configuration retrieved'},
+        304: {'description': 'Configuration unchanged since the ETag sent in If-None-Match'}
+    }
 )
 @csrf_exempt
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def get_agent_config(request):
+@throttle_classes([agent_throttle('config')])
+async def get_agent_config(request):
     """Get agent configuration"""
     try:
         agent_id = request.query_params.get('agent_id')
@@ -493,15 +872,13 @@ def get_agent_config(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Return default configuration
-        # Future: make this configurable per agent or globally
-        config = {
-            'enforce_acl': True,
-            'dangerous_ext': ['.exe', '.ps1', '.bat', '.vbs', '.scr', '.com', '.pif'],
-            'max_upload_size': 52428800  # 50MB
-        }
+        policy = await policy_engine.aget()
+        if _not_modified(request, policy.etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': policy.etag})
+
+        config = agent_config(policy)
         logger.debug(f"Returning config for agent_id={agent_id}: {config}")
-        return Response(config, status=status.HTTP_200_OK)
+        return Response(config, status=status.HTTP_200_OK, headers={'ETag': policy.etag})
 
     except Exception as e:
         logger.error(f"Get config error: agent_id={agent_id if 'agent_id' in locals() else 'unknown'}, error={str(e)}", exc_info=True)
@@ -548,7 +925,9 @@ def get_agent_config(request):
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
-def usb_event(request):
+@throttle_classes([agent_throttle('events')])
+@parser_classes(AGENT_PARSER_CLASSES)
+async def usb_event(request):
     """Process USB insertion event and return file action policies"""
     try:
         data = request.data
@@ -568,9 +947,8 @@ def usb_event(request):
             )
 
         # Verify agent exists
-        try:
-            agent = Agent.objects.get(agent_id=agent_id)
-        except Agent.DoesNotExist:
+        agent = await agent_cache.aget(agent_id)
+        if agent is None:
             logger.error(f"Agent not found for USB event: agent_id={agent_id}")
             return Response(
                 {'error': 'agent_not_found'},
@@ -578,24 +956,7 @@ def usb_event(request):
             )
 
         # Analyze files and determine actions
-        file_actions = {}
-        dangerous_extensions = ['.exe', '.ps1', '.bat', '.vbs', '.scr', '.com', '.pif']
-
-        for file_info in files:
-            relpath = file_info.get('relpath')
-            ext = file_info.get('ext', '').lower()
-            vt_result = file_info.get('vt_result')
-
-            # Determine action based on file characteristics
-            if vt_result and vt_result.get('malicious', 0) > 0:
-                # VirusTotal detected malware
-                file_actions[relpath] = 'quarantine'
-                logger.warning(f"Malware detected: agent_id={agent_id}, file={relpath}, malicious_count={vt_result.get('malicious')}")
-            elif ext in dangerous_extensions:
-                # Dangerous extension - upload for deep scan
-                file_actions[relpath] = 'upload_for_deep_scan'
-                logger.info(f"Dangerous file detected: agent_id={agent_id}, file={relpath}, ext={ext}")
-            # else: allow by default (not added to file_actions)
+        file_actions = await sync_to_async(usb_file_actions)(agent_id, files, await policy_engine.aget())
 
         logger.info(f"USB event processed: agent_id={agent_id}, total_files={len(files)}, actions={len(file_actions)}")
 
@@ -628,7 +989,9 @@ def usb_event(request):
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
-def tamper_alert(request):
+@throttle_classes([agent_throttle('events')])
+@parser_classes(AGENT_PARSER_CLASSES)
+async def tamper_alert(request):
     """Process tamper detection alert from agent"""
     try:
         data = request.data
@@ -646,27 +1009,16 @@ def tamper_alert(request):
             )
 
         # Verify agent exists
-        try:
-            agent = Agent.objects.get(agent_id=agent_id)
-        except Agent.DoesNotExist:
+        agent = await agent_cache.aget(agent_id)
+        if agent is None:
             logger.error(f"Agent not found for tamper alert: agent_id={agent_id}")
             return Response(
                 {'error': 'agent_not_found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Update agent status to suspicious
-        agent.status = 'suspicious'
-        agent.save()
-        logger.warning(f"Agent status updated to suspicious: agent_id={agent_id}, user={agent.user.email}")
-
-        # Create an incident for tamper detection
-        incident = Incident.objects.create(
-            user=agent.user,
-            incident_type=f'Tamper Detection: {detail}',
-            severity='CRITICAL'
-        )
-        logger.critical(f"Tamper incident created: incident_id={incident.id}, agent_id={agent_id}, user={agent.user.email}, detail={detail}")
+        # Flag the agent as suspicious and create an incident for tamper detection
+        await sync_to_async(record_tamper)(agent, detail)
 
         return Response({
             'status': 'ok',
@@ -698,7 +1050,9 @@ def tamper_alert(request):
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
-def insider_alert(request):
+@throttle_classes([agent_throttle('events')])
+@parser_classes(AGENT_PARSER_CLASSES)
+async def insider_alert(request):
     """Process insider threat alert from agent"""
     try:
         data = request.data
@@ -717,35 +1071,16 @@ def insider_alert(request):
             )
 
         # Verify agent exists
-        try:
-            agent = Agent.objects.get(agent_id=agent_id)
-        except Agent.DoesNotExist:
+        agent = await agent_cache.aget(agent_id)
+        if agent is None:
             logger.error(f"Agent not found for insider alert: agent_id={agent_id}")
             return Response(
                 {'error': 'agent_not_found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Create event
-        event = Event.objects.create(
-            user=agent.user,
-            event_type=event_type,
-            event_data=details
-        )
-        logger.info(f"Insider event created: event_id={event.id}, agent_id={agent_id}, type={event_type}")
-
-        # Create incident based on severity
-        severity = 'MEDIUM'
-        if 'bulk_export' in event_type.lower():
-            severity = 'CRITICAL'
-            logger.critical(f"Bulk export detected: agent_id={agent_id}, user={agent.user.email}")
-
-        incident = Incident.objects.create(
-            user=agent.user,
-            incident_type=f'Insider Threat: {event_type}',
-            severity=severity
-        )
-        logger.warning(f"Insider incident created: incident_id={incident.id}, agent_id={agent_id}, user={agent.user.email}, severity={severity}, type={event_type}")
+        # Create event and an incident based on severity
+        await sync_to_async(record_insider_alert)(agent, event_type, details)
 
         return Response({
             'status': 'ok',
@@ -760,6 +1095,86 @@ def insider_alert(request):
         )
 
 
+@extend_schema(
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'agent_id': {'type': 'string'},
+                'operations': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'op': {'type': 'string', 'enum': list(BATCH_OPERATIONS)},
+                            'data': {'type': 'object'}
+                        }
+                    }
+                }
+            }
+        }
+    },
+    responses={200: {'description': 'Ordered results of the batch sub-operations'}}
+)
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([agent_throttle('batch')])
+@parser_classes(AGENT_PARSER_CLASSES)
+async def agent_batch(request):
+    """Run several agent operations in one request, sharing one agent lookup and one transaction"""
+    try:
+        data = request.data
+        agent_id = data.get('agent_id')
+        operations = data.get('operations', [])
+
+        if not agent_id:
+            logger.warning(f"Batch request missing agent_id")
+            return Response(
+                {'error': 'missing_agent_id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not isinstance(operations, list) or not operations:
+            return Response(
+                {'error': 'invalid_operations'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(operations) > settings.AGENT_BATCH_MAX_OPERATIONS:
+            return Response(
+                {'error': 'too_many_operations', 'max_operations': settings.AGENT_BATCH_MAX_OPERATIONS},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        unknown = [
+            index for index, operation in enumerate(operations)
+            if not isinstance(operation, dict) or operation.get('op') not in BATCH_OPERATIONS
+            or not isinstance(operation.get('data') or {}, dict)
+        ]
+        if unknown:
+            logger.warning(f"Batch request with invalid operations: agent_id={agent_id}, indexes={unknown}")
+            return Response(
+                {'error': 'invalid_operations', 'indexes': unknown},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        logger.info(f"Batch request from agent_id={agent_id}, ops={[operation['op'] for operation in operations]}")
+
+        results = await sync_to_async(run_batch)(agent_id, operations, request.META.get('REMOTE_ADDR'))
+
+        return Response({
+            'results': results
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Batch error: agent_id={agent_id if 'agent_id' in locals() else 'unknown'}, error={str(e)}", exc_info=True)
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 # ============================================================================
 # API Endpoints for Agent Management and Monitoring
 # ============================================================================
@@ -780,8 +1195,8 @@ def insider_alert(request):
             required=False,
             description='Filter agents by user ID'
         ),
-    ],
-    responses={200: AgentSerializer(many=True)}
+    ] + KEYSET_PAGINATION_PARAMETERS,
+    responses={200: keyset_page_schema('PaginatedAgentList', AgentSerializer)}
 )
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -804,10 +1219,19 @@ def list_agents(request):
             agents = agents.filter(user_id=user_id)
             logger.debug(f"Filtering agents by user_id: {user_id}")
 
-        serializer = AgentSerializer(agents, many=True)
-        logger.info(f"Returning {agents.count()} agents")
+        paginator = KeysetPagination()
+        try:
+            page = paginator.paginate_queryset(agents, request)
+        except InvalidCursor:
+            return Response(
+                {'error': 'invalid_cursor'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        serializer = AgentSerializer(page, many=True)
+        logger.info(f"Returning {len(page)} agents")
+
+        return paginator.get_paginated_response(serializer.data)
 
     except Exception as e:
         logger.error(f"List agents error: {str(e)}", exc_info=True)
@@ -847,6 +1271,98 @@ def get_agent_detail(request, agent_id):
         )
 
 
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name='window',
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.QUERY,
+            description='Look-back window in seconds (default 86400, max 2592000)'
+        ),
+    ],
+    responses={200: {'description': 'Uptime spans of the agent in the window and the share of it the agent was up'}}
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_agent_uptime(request, agent_id):
+    """Get the uptime timeline of a specific agent"""
+    try:
+        try:
+            window = int(request.query_params.get('window', 24 * 3600))
+        except ValueError:
+            return Response(
+                {'error': 'invalid_window'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        window = min(max(window, 60), 30 * 24 * 3600)
+
+        if not Agent.objects.filter(agent_id=agent_id).exists():
+            logger.warning(f"Agent not found: agent_id={agent_id}")
+            return Response(
+                {'error': 'agent_not_found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        uptime = agent_liveness.uptime(agent_id, window)
+        return Response(uptime, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Get agent uptime error: {str(e)}", exc_info=True)
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@extend_schema(
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'command_type': {'type': 'string'},
+                'payload': {'type': 'object'}
+            }
+        }
+    },
+    responses={201: AgentCommandSerializer()}
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def enqueue_command(request, agent_id):
+    """Queue a command for delivery to an agent"""
+    try:
+        command_type = request.data.get('command_type')
+        payload = request.data.get('payload', {})
+
+        logger.info(f"Command enqueue request for agent_id={agent_id}, command_type={command_type}")
+
+        if not command_type or not isinstance(payload, dict):
+            return Response(
+                {'error': 'invalid_command'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not Agent.objects.filter(agent_id=agent_id).exists():
+            logger.warning(f"Agent not found for command enqueue: agent_id={agent_id}")
+            return Response(
+                {'error': 'agent_not_found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        command = command_queue.enqueue(agent_id, command_type, payload)
+        serializer = AgentCommandSerializer(command)
+
+        logger.info(f"Command queued: command_id={command.id}, agent_id={agent_id}, command_type={command_type}")
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    except Exception as e:
+        logger.error(f"Enqueue command error: {str(e)}", exc_info=True)
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @extend_schema(
     parameters=[
         OpenApiParameter(
@@ -861,10 +1377,10 @@ def get_agent_detail(request, agent_id):
             type=OpenApiTypes.STR,
             location=OpenApiParameter.QUERY,
             required=False,
-            description='Filter by upload status (pending, completed, failed)'
+            description='Filter by upload status (pending, completed, failed, expired)'
         ),
-    ],
-    responses={200: FileUploadSerializer(many=True)}
+    ] + KEYSET_PAGINATION_PARAMETERS,
+    responses={200: keyset_page_schema('PaginatedFileUploadList', FileUploadSerializer)}
 )
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -887,10 +1403,20 @@ def list_file_uploads(request):
             uploads = uploads.filter(status=status_filter)
             logger.debug(f"Filtering uploads by status: {status_filter}")
 
-        serializer = FileUploadSerializer(uploads, many=True)
-        logger.info(f"Returning {uploads.count()} file uploads")
+        paginator = KeysetPagination()
+        try:
+            page = paginator.paginate_queryset(uploads, request)
+        except InvalidCursor:
+            return Response(
+                {'error': 'invalid_cursor'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # One storage check per page, not one connection attempt per row while MinIO is down
+        serializer = FileUploadSerializer(page, many=True, context={'storage_available': storage.is_available()})
+        logger.info(f"Returning {len(page)} file uploads")
+
+        return paginator.get_paginated_response(serializer.data)
 
     except Exception as e:
         logger.error(f"List file uploads error: {str(e)}", exc_info=True)
@@ -911,7 +1437,7 @@ def get_file_upload_detail(request, upload_id):
         logger.info(f"File upload detail request for upload_id={upload_id}")
 
         upload = FileUpload.objects.select_related('agent', 'agent__user').get(upload_id=upload_id)
-        serializer = FileUploadSerializer(upload)
+        serializer = FileUploadSerializer(upload, context={'storage_available': storage.is_available()})
 
         logger.info(f"Returning file upload details for {upload_id}")
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -930,6 +1456,42 @@ def get_file_upload_detail(request, upload_id):
         )
 
 
+@extend_schema(
+    parameters=[
+        OpenApiParameter(
+            name='window',
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.QUERY,
+            description='Look-back window in seconds (default 3600, max 604800)'
+        ),
+    ],
+    responses={200: {'description': 'Upload throughput, per-state latency and pending backlog'}}
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def upload_pipeline_metrics(request):
+    """Get throughput and latency metrics for the upload pipeline"""
+    try:
+        try:
+            window = int(request.query_params.get('window', 3600))
+        except ValueError:
+            return Response(
+                {'error': 'invalid_window'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        window = min(max(window, 60), 7 * 24 * 3600)
+
+        metrics = upload_metrics(window)
+        return Response(metrics, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Upload metrics error: {str(e)}", exc_info=True)
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @extend_schema(
     parameters=[
         OpenApiParameter(
@@ -946,8 +1508,8 @@ def get_file_upload_detail(request, upload_id):
             required=False,
             description='Filter by event type'
         ),
-    ],
-    responses={200: OfflineEventSerializer(many=True)}
+    ] + KEYSET_PAGINATION_PARAMETERS,
+    responses={200: keyset_page_schema('PaginatedOfflineEventList', OfflineEventSerializer)}
 )
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -970,10 +1532,19 @@ def list_offline_events(request):
             events = events.filter(event_type=event_type)
             logger.debug(f"Filtering offline events by event_type: {event_type}")
 
-        serializer = OfflineEventSerializer(events, many=True)
-        logger.info(f"Returning {events.count()} offline events")
+        paginator = KeysetPagination()
+        try:
+            page = paginator.paginate_queryset(events, request)
+        except InvalidCursor:
+            return Response(
+                {'error': 'invalid_cursor'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = OfflineEventSerializer(page, many=True)
+        logger.info(f"Returning {len(page)} offline events")
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginator.get_paginated_response(serializer.data)
 
     except Exception as e:
         logger.error(f"List offline events error: {str(e)}", exc_info=True)
@@ -996,6 +1567,7 @@ def list_offline_events(request):
             'pending_uploads': {'type': 'integer'},
             'completed_uploads': {'type': 'integer'},
             'failed_uploads': {'type': 'integer'},
+            'expired_uploads': {'type': 'integer'},
         }
     }}
 )
@@ -1006,16 +1578,7 @@ def agent_statistics(request):
     try:
         logger.info(f"Agent statistics request from IP: {request.META.get('REMOTE_ADDR')}")
 
-        stats = {
-            'total_agents': Agent.objects.count(),
-            'online_agents': Agent.objects.filter(status='online').count(),
-            'offline_agents': Agent.objects.filter(status='offline').count(),
-            'suspicious_agents': Agent.objects.filter(status='suspicious').count(),
-            'total_uploads': FileUpload.objects.count(),
-            'pending_uploads': FileUpload.objects.filter(status='pending').count(),
-            'completed_uploads': FileUpload.objects.filter(status='completed').count(),
-            'failed_uploads': FileUpload.objects.filter(status='failed').count(),
-        }
+        stats = fleet_stats.get()
 
         logger.info(f"Returning agent statistics: {stats}")
         return Response(stats, status=status.HTTP_200_OK)
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+from whitehat_app.models import Agent
+
+AgentIdentity = namedtuple('AgentIdentity', ['agent_pk', 'user_pk', 'user_email', 'status'])
+
+
+class AgentCache:
+    """
+    Process-local LRU cache of agent_id -> AgentIdentity.
+
+    Agent-facing endpoints only need to know that an agent exists, who owns
+    it and its status, so they resolve it here instead of loading the Agent
+    and its User on every request. Entries expire after AGENT_CACHE_TTL
+    seconds and are invalidated on Agent/User save and delete (see signals).
+    """
+
+    def __init__(self):
+        self.max_size = settings.AGENT_CACHE_MAX_SIZE
+        self.ttl = settings.AGENT_CACHE_TTL
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, agent_id):
+        """Return the AgentIdentity for agent_id, or None if the agent does not exist"""
+        identity = self._lookup(agent_id)
+        if identity is not None:
+            return identity
+
+        row = (
+            Agent.objects.filter(agent_id=agent_id)
+            .values_list('agent_id', 'user_id', 'user__email', 'status')
+            .first()
+        )
+        if row is None:
+            return None
+
+        identity = AgentIdentity(*row)
+        self._store(agent_id, identity)
+        return identity
+
+    async def aget(self, agent_id):
+        identity = self._lookup(agent_id)
+        if identity is not None:
+            return identity
+
+        row = await (
+            Agent.objects.filter(agent_id=agent_id)
+            .values_list('agent_id', 'user_id', 'user__email', 'status')
+            .afirst()
+        )
+        if row is None:
+            return None
+
+        identity = AgentIdentity(*row)
+        self._store(agent_id, identity)
+        return identity
+
+    def invalidate(self, agent_id):
+        with self._lock:
+            self._entries.pop(agent_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate_user(self, user_pk):
+        """Drop the cached agents owned by one user"""
+        with self._lock:
+            for agent_id in [agent_id for agent_id, (identity, _) in self._entries.items() if identity.user_pk == user_pk]:
+                del self._entries[agent_id]
+
+    def update_heartbeats(self, agents):
+        """
+        Refresh cached status for agents written by the heartbeat writer,
+        whose bulk upserts do not send post_save.
+        """
+        with self._lock:
+            for agent in agents:
+                entry = self._entries.get(agent.agent_id)
+                if entry is None:
+                    continue
+                identity, expires_at = entry
+                if identity.user_pk == agent.user_id:
+                    self._entries[agent.agent_id] = (identity._replace(status=agent.status), expires_at)
+                else:
+                    del self._entries[agent.agent_id]
+
+    def _lookup(self, agent_id):
+        with self._lock:
+            entry = self._entries.get(agent_id)
+            if entry is None:
+                return None
+
+            identity, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[agent_id]
+                return None
+
+            self._entries.move_to_end(agent_id)
+            return identity
+
+    def _store(self, agent_id, identity):
+        with self._lock:
+            self._entries[agent_id] = (identity, time.monotonic() + self.ttl)
+            self._entries.move_to_end(agent_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+agent_cache = AgentCache()
@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from whitehat_app.agent_cache import agent_cache
+from whitehat_app.fleet_stats import fleet_stats
+from whitehat_app.models import Agent, AgentUptimeSpan
+
+logger = logging.getLogger(__name__)
+
+class AgentLiveness:
+    """
+    Marks online agents offline once their last heartbeat is older than
+    AGENT_OFFLINE_AFTER seconds, and keeps each agent's uptime timeline as
+    AgentUptimeSpan rows, one per stretch of heartbeats. A silent
+    suspicious agent keeps its status so the tamper flag is not lost; a
+    sweep only closes its uptime span.
+
+    A daemon thread in each web process runs a sweep every
+    AGENT_LIVENESS_SWEEP_INTERVAL seconds once the process has handled a
+    heartbeat; `manage.py sweep_agents` runs one on demand. A sweep is a
+    range read of the (status, last_heartbeat) index, claimed in chunks
+    with SKIP LOCKED like the upload reaper, so it only touches agents that
+    went silent and the dashboard counts stay accurate without scanning
+    Agent. The heartbeat writer opens a span when a heartbeat comes from a
+    new, offline or silent agent; a sweep closes it at the last heartbeat.
+    """
+
+    def __init__(self):
+        self.offline_after = settings.AGENT_OFFLINE_AFTER
+        self.interval = settings.AGENT_LIVENESS_SWEEP_INTERVAL
+        self.batch_size = settings.AGENT_LIVENESS_BATCH_SIZE
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def cutoff(self):
+        return timezone.now() - timedelta(seconds=self.offline_after)
+
+    def sweep(self):
+        """Run one pass. Returns the number of agents marked offline"""
+        cutoff = self.cutoff()
+        swept = 0
+
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    Agent.objects.select_for_update(skip_locked=True)
+                    .filter(status='online', last_heartbeat__lt=cutoff)
+                    .order_by('last_heartbeat')
+                    .values_list('agent_id', flat=True)[:self.batch_size]
+                )
+                if not batch:
+                    break
+
+                # QuerySet.update() leaves the auto_now last_heartbeat alone
+                Agent.objects.filter(agent_id__in=batch).update(status='offline')
+                self._close_spans(batch)
+
+            for agent_id in batch:
+                agent_cache.invalidate(agent_id)
+            swept += len(batch)
+
+        # Silent suspicious agents stay suspicious; only their span ends
+        open_span = AgentUptimeSpan.objects.filter(agent_id=OuterRef('agent_id'), ended_at__isnull=True)
+        closed = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    Agent.objects.select_for_update(skip_locked=True)
+                    .filter(Exists(open_span), status='suspicious', last_heartbeat__lt=cutoff)
+                    .order_by('last_heartbeat')
+                    .values_list('agent_id', flat=True)[:self.batch_size]
+                )
+                if not batch:
+                    break
+                self._close_spans(batch)
+            closed += len(batch)
+
+        if swept:
+            fleet_stats.invalidate()
+        if swept or closed:
+            logger.info(f"Liveness sweep: agents_offline={swept}, suspicious_silent={closed}")
+        return swept
+
+    def _close_spans(self, agent_ids):
+        AgentUptimeSpan.objects.filter(agent_id__in=agent_ids, ended_at__isnull=True).update(
+            ended_at=Subquery(Agent.objects.filter(agent_id=OuterRef('agent_id')).values('last_heartbeat')[:1])
+        )
+
+    def heartbeat_states(self, agent_ids):
+        """
+        {agent_id: (status, last_heartbeat)} of the agents among agent_ids
+        that are not online and heartbeating; their next heartbeat changes
+        their status or starts an uptime span. Read it before the
+        heartbeats are written.
+        """
+        return {
+            agent_id: (agent_status, last_heartbeat)
+            for agent_id, agent_status, last_heartbeat in (
+                Agent.objects.filter(agent_id__in=agent_ids)
+                .exclude(status='online', last_heartbeat__gte=self.cutoff())
+                .values_list('agent_id', 'status', 'last_heartbeat')
+            )
+        }
+
+    def heartbeats_written(self, previous, created=()):
+        """
+        Open uptime spans for the agents heartbeats brought back, given
+        heartbeat_states() from before the write and the agent_ids the
+        write created.
+        """
+        cutoff = self.cutoff()
+        revived = list(created)
+        for agent_id, (agent_status, last_heartbeat) in previous.items():
+            if agent_status != 'offline' and last_heartbeat >= cutoff:
+                continue
+            # Close the span of an agent that went silent before a sweep reached it
+            AgentUptimeSpan.objects.filter(agent_id=agent_id, ended_at__isnull=True).update(ended_at=last_heartbeat)
+            revived.append(agent_id)
+
+        if revived:
+            now = timezone.now()
+            AgentUptimeSpan.objects.bulk_create([AgentUptimeSpan(agent_id=agent_id, started_at=now) for agent_id in revived])
+        if previous:
+            fleet_stats.invalidate()
+
+    def uptime(self, agent_id, window):
+        """Uptime spans of an agent overlapping the last `window` seconds"""
+        now = timezone.now()
+        start = now - timedelta(seconds=window)
+
+        spans = list(
+            AgentUptimeSpan.objects.filter(agent_id=agent_id)
+            .filter(Q(ended_at__isnull=True) | Q(ended_at__gt=start))
+            .order_by('started_at')
+            .values_list('started_at', 'ended_at')
+        )
+        up_seconds = sum(
+            max((min(ended_at or now, now) - max(started_at, start)).total_seconds(), 0)
+            for started_at, ended_at in spans
+        )
+
+        return {
+            'agent_id': agent_id,
+            'window_seconds': window,
+            'up_seconds': round(up_seconds),
+            'uptime_ratio': round(up_seconds / window, 4),
+            'spans': [{'started_at': started_at, 'ended_at': ended_at} for started_at, ended_at in spans],
+        }
+
+    def ensure_running(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='agent-liveness', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+
+            close_old_connections()
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Liveness sweep error: {str(e)}", exc_info=True)
+            finally:
+                close_old_connections()
+
+
+agent_liveness = AgentLiveness()
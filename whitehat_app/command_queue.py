@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from whitehat_app.models import AgentCommand
+
+logger = logging.getLogger(__name__)
+
+# Waiting agent_ids checked per query by the poller thread
+POLL_CHUNK_SIZE = 1000
+
+
+class CommandQueue:
+    """
+    Per-agent command queue with long-poll delivery.
+
+    Commands live in AgentCommand. Held `commands` requests wait on a
+    process-local wakeup that is fired when a command is saved in the same
+    process. Commands queued by other workers are picked up by one poller
+    thread per process, which checks every waiting agent_id in a single
+    query every AGENT_COMMAND_POLL_INTERVAL seconds and wakes the agents
+    that have due commands, so database load does not grow with the
+    number of held requests.
+
+    A delivered command that is not acknowledged within
+    AGENT_COMMAND_ACK_TIMEOUT seconds is delivered again.
+    """
+
+    def __init__(self):
+        self.poll_interval = settings.AGENT_COMMAND_POLL_INTERVAL
+        self.max_wait = settings.AGENT_COMMAND_LONG_POLL_TIMEOUT
+        self.ack_timeout = settings.AGENT_COMMAND_ACK_TIMEOUT
+        self.max_batch = settings.AGENT_COMMAND_MAX_BATCH
+        self._waiters = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def enqueue(self, agent_id, command_type, payload=None):
+        # post_save (see signals) wakes up held requests for this agent
+        return AgentCommand.objects.create(
+            agent_id=agent_id,
+            command_type=command_type,
+            payload=payload or {},
+        )
+
+    def notify(self, agent_id):
+        with self._lock:
+            waiters = list(self._waiters.get(agent_id, ()))
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def claim(self, agent_id):
+        """Mark due commands for an agent as delivered and return them"""
+        now = timezone.now()
+
+        with transaction.atomic():
+            commands = list(
+                AgentCommand.objects.select_for_update(skip_locked=True)
+                .filter(self._due(now), agent_id=agent_id)
+                .order_by('created_at')[:self.max_batch]
+            )
+            if commands:
+                AgentCommand.objects.filter(id__in=[command.id for command in commands]).update(
+                    status='delivered',
+                    delivered_at=now,
+                )
+                logger.info(f"Delivering {len(commands)} commands to agent_id={agent_id}")
+
+        return commands
+
+    def due_agents(self, agent_ids):
+        """The agent_ids among agent_ids that have due commands"""
+        now = timezone.now()
+        due = set()
+        for start in range(0, len(agent_ids), POLL_CHUNK_SIZE):
+            due.update(
+                AgentCommand.objects.filter(self._due(now), agent_id__in=agent_ids[start:start + POLL_CHUNK_SIZE])
+                .values_list('agent_id', flat=True)
+                .distinct()
+            )
+        return due
+
+    async def poll(self, agent_id, wait):
+        """
+        Claim due commands, holding the request for up to `wait` seconds
+        (capped at AGENT_COMMAND_LONG_POLL_TIMEOUT) until one arrives.
+        """
+        if not math.isfinite(wait):
+            # A NaN deadline never runs out
+            raise ValueError(f"wait must be finite, got {wait}")
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(max(wait, 0), self.max_wait)
+
+        commands = await sync_to_async(self.claim)(agent_id)
+        if not commands and deadline > loop.time():
+            self.ensure_running()
+
+        while not commands:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+
+            # Another worker may claim first; then keep waiting
+            if await self.wait(agent_id, remaining):
+                commands = await sync_to_async(self.claim)(agent_id)
+
+        return commands
+
+    async def wait(self, agent_id, timeout):
+        """Wait up to timeout seconds for a same-process notify() for agent_id"""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.setdefault(agent_id, set()).add(waiter)
+
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(agent_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[agent_id]
+
+    def acknowledge(self, agent_id, command_id, success, result=None, error=None):
+        """Record the agent's outcome for a command. Returns False if the command is unknown"""
+        updated = AgentCommand.objects.filter(
+            id=command_id,
+            agent_id=agent_id,
+            status__in=['pending', 'delivered'],
+        ).update(
+            status='acknowledged' if success else 'failed',
+            result=result,
+            error_message=None if success else (error or 'Unknown error'),
+            acknowledged_at=timezone.now(),
+        )
+        # A repeated ack of an already settled command is not an error
+        return updated > 0 or AgentCommand.objects.filter(id=command_id, agent_id=agent_id).exists()
+
+    def ensure_running(self):
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='command-poller', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+
+            with self._lock:
+                agent_ids = list(self._waiters)
+            if not agent_ids:
+                continue
+
+            close_old_connections()
+            try:
+                for agent_id in self.due_agents(agent_ids):
+                    self.notify(agent_id)
+            except Exception as e:
+                logger.error(f"Command poller error: {str(e)}", exc_info=True)
+            finally:
+                close_old_connections()
+
+    def _due(self, now):
+        return Q(status='pending') | Q(status='delivered', delivered_at__lt=now - timedelta(seconds=self.ack_timeout))
+
+
+command_queue = CommandQueue()
@@ -0,0 +1,138 @@
+import hashlib
+import logging
+
+from django.utils import timezone
+
+from whitehat_app.hash_verdicts import is_sha256
+from whitehat_app.storage import storage
+from whitehat_app.models import StoredObject
+
+logger = logging.getLogger(__name__)
+
+CONTENT_PREFIX = 'objects/sha256'
+STAGING_PREFIX = 'objects/incoming'
+
+
+def content_object_name(sha256):
+    return f"{CONTENT_PREFIX}/{sha256[:2]}/{sha256}"
+
+
+def staging_object_name(key):
+    """Where content-addressed bytes land before their hash is checked"""
+    return f"{STAGING_PREFIX}/{key}"
+
+
+def content_hash_for(object_name):
+    """Return the sha256 an object name is addressed by, or None for other objects"""
+    prefix, _, name = object_name.rpartition('/')
+    if prefix.startswith(f"{CONTENT_PREFIX}/") and is_sha256(name):
+        return name
+    return None
+
+
+class ContentStore:
+    """
+    Content-addressed storage for agent uploads.
+
+    Uploads with a sha256 are stored once under objects/sha256/<aa>/<sha256>.
+    A StoredObject row exists only once the server has hashed the stored
+    bytes itself, so an agent cannot claim a hash for different content
+    and have other agents' uploads linked to it.
+
+    Rows are trusted without asking storage on every upload request. A row
+    is only forgotten once a read of its object fails with ObjectNotFound
+    (see object_missing), never on a timeout or an unreachable storage.
+    """
+
+    def find_many(self, hashes):
+        """Return {sha256: StoredObject} for the hashes whose content has been verified"""
+        if not hashes:
+            return {}
+        return StoredObject.objects.in_bulk(list(hashes))
+
+    def object_missing(self, object_name):
+        """
+        Forget the verified content stored at object_name after storage
+        reported it does not exist, so the next upload of it transfers the
+        bytes again.
+        """
+        sha256 = content_hash_for(object_name)
+        if sha256 is None:
+            return
+
+        deleted, _ = StoredObject.objects.filter(sha256=sha256, object_name=object_name).delete()
+        if deleted:
+            logger.warning(f"Stored object missing from storage, forgetting it: sha256={sha256}, object_name={object_name}")
+
+    def record(self, sha256, bucket, object_name, size):
+        stored, _ = StoredObject.objects.get_or_create(
+            sha256=sha256,
+            defaults={
+                'bucket': bucket,
+                'object_name': object_name,
+                'size': size,
+                'verified_at': timezone.now(),
+            }
+        )
+        return stored
+
+    def verify(self, sha256, bucket, object_name, staged_name=None, max_size=None):
+        """
+        Return the StoredObject for an upload that claims sha256, hashing
+        the uploaded object if the content has not been verified yet.
+        Returns None if the object is missing, is larger than max_size or
+        its content does not match.
+
+        With staged_name, the upload was written there and is copied to
+        object_name only once its hash matches; the staged copy is removed
+        either way.
+        """
+        if not storage.is_available():
+            return None
+
+        try:
+            stored = StoredObject.objects.filter(sha256=sha256).first()
+            if stored is not None:
+                return stored
+
+            source_name = staged_name or object_name
+            size = self._hash_object(sha256, bucket, source_name, max_size)
+            if size is None:
+                return None
+
+            if staged_name:
+                storage.copy(bucket, staged_name, object_name)
+            return self.record(sha256, bucket, object_name, size)
+        finally:
+            if staged_name:
+                try:
+                    storage.remove(bucket, staged_name)
+                except Exception as e:
+                    logger.error(f"Failed to remove staged upload: object_name={staged_name}, error={str(e)}")
+
+    def _hash_object(self, sha256, bucket, object_name, max_size=None):
+        """Return the object's size if its content hashes to sha256, else None"""
+        digest = hashlib.sha256()
+        size = 0
+        # One byte past max_size is enough to tell the object is too large
+        length = None if max_size is None else max_size + 1
+        try:
+            for chunk in storage.iter_chunks(bucket, object_name, chunk_size=1024 * 1024, length=length):
+                digest.update(chunk)
+                size += len(chunk)
+        except Exception as e:
+            logger.error(f"Failed to read object for verification: object_name={object_name}, error={str(e)}")
+            return None
+
+        if max_size is not None and size > max_size:
+            logger.warning(f"Stored object is larger than its upload request: object_name={object_name}, max_size={max_size}")
+            return None
+
+        if digest.hexdigest() != sha256:
+            logger.warning(f"Stored object does not match its hash: object_name={object_name}, actual={digest.hexdigest()}")
+            return None
+
+        return size
+
+
+content_store = ContentStore()
@@ -0,0 +1,246 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from whitehat_app.content_store import content_store
+from whitehat_app.hash_verdicts import verdict_index
+from whitehat_app.models import FileUpload, HashVerdict, ScanSignature
+from whitehat_app.scan_engine import init_worker, scan_object
+from whitehat_app.storage import ObjectNotFound
+
+logger = logging.getLogger(__name__)
+
+# Used while no ScanSignature rows are active, so a fresh install still
+# exercises the whole pipeline
+DEFAULT_SIGNATURES = [
+    ('EICAR test file', b'X5O!P%@AP[4\\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*', 'malicious'),
+]
+
+FINAL_SCAN_STATUSES = ('clean', 'suspicious', 'malicious')
+
+
+def load_signatures():
+    """Return (version, [(name, pattern bytes, verdict)]) for the active signatures"""
+    state = ScanSignature.objects.aggregate(
+        active=Count('id', filter=Q(is_active=True)),
+        latest=Max('updated_at'),
+    )
+    if not state['active']:
+        return 'default', DEFAULT_SIGNATURES
+
+    signatures = []
+    for signature in ScanSignature.objects.filter(is_active=True).order_by('id'):
+        try:
+            if signature.pattern_type == 'hex':
+                pattern = bytes.fromhex(signature.pattern)
+            else:
+                pattern = signature.pattern.encode('utf-8')
+        except ValueError:
+            logger.warning(f"Skipping scan signature with invalid hex pattern: id={signature.id}, name={signature.name}")
+            continue
+        if pattern:
+            signatures.append((signature.name, pattern, signature.verdict))
+
+    return f"{state['active']}:{state['latest'].isoformat()}", signatures
+
+
+def scan_verdict(result):
+    verdicts = {match['verdict'] for match in result['matches']}
+    if 'malicious' in verdicts:
+        return 'malicious'
+    if 'suspicious' in verdicts:
+        return 'suspicious'
+    return 'clean'
+
+
+class DeepScanner:
+    """
+    Scans completed uploads against the active ScanSignature set.
+
+    Completing an upload queues it (scan_status='queued'). Queued uploads
+    are claimed with SKIP LOCKED, so several `manage.py deep_scan_worker`
+    processes can share the queue, and their objects are streamed from
+    MinIO and matched in a process pool that is separate from the web
+    tier. At most `workers` objects are in flight per scanner; claims
+    stuck in 'scanning' past AGENT_DEEP_SCAN_TIMEOUT are picked up again.
+
+    Pool processes only read objects; results are written here, to the
+    upload rows and, for verified content, to HashVerdict. Content that
+    was already scanned with the same signature version is not read again.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or settings.AGENT_DEEP_SCAN_WORKERS
+        self.chunk_size = settings.AGENT_DEEP_SCAN_CHUNK_SIZE
+        self.max_matches = settings.AGENT_DEEP_SCAN_MAX_MATCHES
+        self.poll_interval = settings.AGENT_DEEP_SCAN_POLL_INTERVAL
+        self.timeout = settings.AGENT_DEEP_SCAN_TIMEOUT
+
+    def run(self, once=False):
+        """Scan until stopped, or with once=True until the queue is empty"""
+        context = multiprocessing.get_context('spawn')
+
+        while True:
+            executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=init_worker)
+            try:
+                while True:
+                    close_old_connections()
+                    try:
+                        scanned = self.scan_pending(executor)
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Deep scan pass error: {str(e)}", exc_info=True)
+                        scanned = 0
+
+                    if once and not scanned:
+                        return
+                    if not scanned:
+                        time.sleep(self.poll_interval)
+            except BrokenProcessPool as e:
+                # A scan process died (e.g. killed for memory); its upload is
+                # marked as failed and the pool is replaced
+                logger.error(f"Deep scan process pool broken, restarting it: {str(e)}")
+            finally:
+                executor.shutdown(cancel_futures=True)
+
+    def scan_pending(self, executor):
+        """Drain the queue through executor. Returns the number of uploads finished"""
+        version, signatures = load_signatures()
+        in_flight = {}
+        finished = 0
+        exhausted = False
+
+        while True:
+            free = self.workers - len(in_flight)
+            if free > 0 and not exhausted:
+                claimed = self._claim(free)
+                exhausted = len(claimed) < free
+
+                for key, uploads in self._group(claimed).items():
+                    reused = self._previous_result(key, version)
+                    if reused is not None:
+                        self._finish(uploads, reused)
+                        finished += len(uploads)
+                        continue
+
+                    upload = uploads[0]
+                    future = executor.submit(
+                        scan_object, upload.bucket, upload.object_name, version,
+                        signatures, self.chunk_size, self.max_matches,
+                    )
+                    in_flight[future] = uploads
+
+            if not in_flight:
+                if exhausted:
+                    break
+                continue
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                uploads = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except ObjectNotFound as e:
+                    content_store.object_missing(uploads[0].object_name)
+                    self._fail(uploads, e)
+                except Exception as e:
+                    self._fail(uploads, e)
+                else:
+                    self._finish(uploads, result)
+                finished += len(uploads)
+
+        return finished
+
+    def _claim(self, limit):
+        now = timezone.now()
+        stale = now - timedelta(seconds=self.timeout)
+
+        with transaction.atomic():
+            upload_ids = list(
+                FileUpload.objects.select_for_update(skip_locked=True)
+                .filter(Q(scan_status='queued') | Q(scan_status='scanning', scanned_at__lt=stale))
+                .order_by('finished_at')
+                .values_list('upload_id', flat=True)[:limit]
+            )
+            if not upload_ids:
+                return []
+
+            FileUpload.objects.filter(upload_id__in=upload_ids).update(scan_status='scanning', scanned_at=now)
+
+        return list(FileUpload.objects.filter(upload_id__in=upload_ids))
+
+    def _group(self, uploads):
+        """Uploads of the same stored content are scanned once"""
+        groups = {}
+        for upload in uploads:
+            key = upload.stored_object_id or (upload.bucket, upload.object_name, upload.upload_id)
+            groups.setdefault(key, []).append(upload)
+        return groups
+
+    def _previous_result(self, key, version):
+        if not isinstance(key, str):
+            return None
+
+        previous = (
+            FileUpload.objects.filter(stored_object_id=key, scan_status__in=FINAL_SCAN_STATUSES)
+            .order_by('-scanned_at')
+            .values_list('scan_result', flat=True)
+            .first()
+        )
+        if previous and previous.get('signature_version') == version:
+            return previous
+        return None
+
+    def _finish(self, uploads, result):
+        verdict = scan_verdict(result)
+        FileUpload.objects.filter(upload_id__in=[upload.upload_id for upload in uploads]).update(
+            scan_status=verdict,
+            scan_result=result,
+            scanned_at=timezone.now(),
+        )
+
+        sha256 = uploads[0].stored_object_id
+        if sha256 and verdict != 'clean':
+            self._record_verdict(sha256, verdict, result)
+
+        if verdict != 'clean':
+            logger.warning(
+                f"Deep scan match: upload_ids={[upload.upload_id for upload in uploads]}, verdict={verdict}, "
+                f"signatures={sorted({match['signature'] for match in result['matches']})}"
+            )
+
+    def _record_verdict(self, sha256, verdict, result):
+        """
+        Only verified content gets a hash verdict. A signature miss is not
+        evidence that a file is clean, so clean scans are not recorded.
+        """
+        detail = ', '.join(sorted({match['signature'] for match in result['matches']}))
+
+        if verdict == 'malicious':
+            # Overrides earlier automated verdicts, but never an analyst's
+            updated = (
+                HashVerdict.objects.filter(sha256=sha256)
+                .exclude(source='analyst')
+                .update(verdict='malicious', source='deep_scan', detail=detail, updated_at=timezone.now())
+            )
+            if updated:
+                return
+
+        verdict_index.record({sha256: verdict}, source='deep_scan', detail=detail)
+
+    def _fail(self, uploads, error):
+        logger.error(f"Deep scan failed: upload_ids={[upload.upload_id for upload in uploads]}, error={str(error)}")
+        FileUpload.objects.filter(upload_id__in=[upload.upload_id for upload in uploads]).update(
+            scan_status='error',
+            scan_result={'error': str(error)},
+            scanned_at=timezone.now(),
+        )
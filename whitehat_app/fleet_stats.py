@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Q
+
+from whitehat_app.models import Agent, FileUpload, StatisticsCounter
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'agent_statistics'
+AGENT_STATUSES = ('online', 'offline', 'suspicious')
+UPLOAD_STATUSES = ('pending', 'completed', 'failed', 'expired')
+UPLOAD_COUNTERS = ('uploads.total',) + tuple(f'uploads.{upload_status}' for upload_status in UPLOAD_STATUSES)
+
+
+def _upload_stat_name(counter_name):
+    # 'uploads.total' -> 'total_uploads'
+    return f"{counter_name.split('.', 1)[1]}_uploads"
+
+
+class FleetStatistics:
+    """
+    Agent and upload counts for the dashboard.
+
+    Each table is counted with one conditional-aggregation query, and the
+    result is kept in the default cache for AGENT_STATS_CACHE_TTL seconds.
+    Code that changes an agent or upload status invalidates it on commit,
+    so the TTL only bounds changes made elsewhere, e.g. in the admin.
+
+    With AGENT_STATS_INCREMENTAL, upload counts are read from
+    StatisticsCounter rows that uploads_changed() adjusts in the same
+    transaction as every upload status change, so a dashboard refresh never
+    scans FileUpload. Deleted and hand-edited uploads are not tracked, so
+    a daemon thread in each web process recounts them with reconcile()
+    every AGENT_STATS_RECONCILE_INTERVAL seconds once the process has
+    served statistics. Agents are always counted, their table is bounded
+    by the fleet size.
+    """
+
+    def __init__(self):
+        self.ttl = settings.AGENT_STATS_CACHE_TTL
+        self.incremental = settings.AGENT_STATS_INCREMENTAL
+        self.reconcile_interval = settings.AGENT_STATS_RECONCILE_INTERVAL
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def get(self):
+        self.ensure_running()
+        cache = caches['default']
+        stats = cache.get(CACHE_KEY)
+        if stats is None:
+            stats = {**self._count_agents(), **self._upload_counts()}
+            cache.set(CACHE_KEY, stats, self.ttl)
+        return stats
+
+    def invalidate(self):
+        caches['default'].delete(CACHE_KEY)
+
+    def agents_changed(self):
+        transaction.on_commit(self.invalidate)
+
+    def uploads_changed(self, transitions):
+        """
+        Record upload status changes, given as {(old status, new status):
+        number of uploads} with None as the old status of new uploads.
+        Call it in the transaction that writes the uploads.
+        """
+        deltas = Counter()
+        for (old_status, new_status), count in transitions.items():
+            if old_status == new_status or not count:
+                continue
+            if old_status is None:
+                deltas['uploads.total'] += count
+            else:
+                deltas[f'uploads.{old_status}'] -= count
+            deltas[f'uploads.{new_status}'] += count
+
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        if self.incremental:
+            # Same lock order everywhere, so concurrent writers cannot deadlock
+            for name in sorted(deltas):
+                StatisticsCounter.objects.filter(name=name).update(value=F('value') + deltas[name])
+        transaction.on_commit(self.invalidate)
+
+    def reconcile(self):
+        """Recount uploads into the counters; returns the upload counts"""
+        with transaction.atomic():
+            # Writers update counters in the transaction that changes the
+            # uploads, so holding the counter rows makes the count exact
+            StatisticsCounter.objects.bulk_create(
+                [StatisticsCounter(name=name) for name in UPLOAD_COUNTERS], ignore_conflicts=True
+            )
+            list(StatisticsCounter.objects.select_for_update().filter(name__in=UPLOAD_COUNTERS).order_by('name'))
+
+            counts = self._count_uploads()
+            for name in UPLOAD_COUNTERS:
+                StatisticsCounter.objects.filter(name=name).update(value=counts[_upload_stat_name(name)])
+
+        transaction.on_commit(self.invalidate)
+        logger.info(f"Upload statistics counters reconciled: {counts}")
+        return counts
+
+    def ensure_running(self):
+        if not self.incremental or self.reconcile_interval <= 0 or self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='statistics-reconciler', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.reconcile_interval)
+
+            close_old_connections()
+            try:
+                self.reconcile()
+            except Exception as e:
+                logger.error(f"Statistics reconcile error: {str(e)}", exc_info=True)
+            finally:
+                close_old_connections()
+
+    def _count_agents(self):
+        return Agent.objects.aggregate(
+            total_agents=Count('agent_id'),
+            **{
+                f'{agent_status}_agents': Count('agent_id', filter=Q(status=agent_status))
+                for agent_status in AGENT_STATUSES
+            },
+        )
+
+    def _count_uploads(self):
+        return FileUpload.objects.aggregate(
+            total_uploads=Count('upload_id'),
+            **{
+                f'{upload_status}_uploads': Count('upload_id', filter=Q(status=upload_status))
+                for upload_status in UPLOAD_STATUSES
+            },
+        )
+
+    def _upload_counts(self):
+        if not self.incremental:
+            return self._count_uploads()
+
+        counters = dict(StatisticsCounter.objects.filter(name__in=UPLOAD_COUNTERS).values_list('name', 'value'))
+        if len(counters) < len(UPLOAD_COUNTERS):
+            # First use of incremental mode
+            return self.reconcile()
+        return {_upload_stat_name(name): counters[name] for name in UPLOAD_COUNTERS}
+
+
+fleet_stats = FleetStatistics()
@@ -0,0 +1,228 @@
+import logging
+import math
+import re
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+
+from whitehat_app.models import HashVerdict
+
+logger = logging.getLogger(__name__)
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+VERDICT_CODES = {'malicious': 1, 'suspicious': 2, 'clean': 3}
+VERDICT_NAMES = {code: name for name, code in VERDICT_CODES.items()}
+
+DIGEST_SIZE = 32
+
+# Hashes re-read per query after record() inserts them
+RECORD_CHUNK_SIZE = 1000
+
+
+def is_sha256(value):
+    return isinstance(value, str) and SHA256_RE.match(value) is not None
+
+
+class BloomFilter:
+    """
+    Bloom filter over raw sha256 digests.
+
+    The digests are already uniformly distributed, so bit positions are
+    derived from the digest bytes by double hashing instead of rehashing.
+    """
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, digest):
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        bits = self.bits
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % self.size
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest):
+        # Most inventory hashes are unknown, so stop at the first unset bit
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        bits = self.bits
+        size = self.size
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class VerdictSnapshot:
+    """
+    Immutable in-memory copy of HashVerdict.
+
+    Digests are stored sorted and concatenated in one bytes object with a
+    parallel bytes object of verdict codes, so a million hashes cost about
+    33MB. Lookups check the Bloom filter first and only binary-search the
+    array on a probable hit.
+    """
+
+    def __init__(self, rows, error_rate):
+        rows.sort()
+        self.count = len(rows)
+        self.keys = b''.join(digest for digest, _ in rows)
+        self.codes = bytes(code for _, code in rows)
+        self.bloom = BloomFilter(self.count, error_rate)
+        for digest, _ in rows:
+            self.bloom.add(digest)
+
+    def get(self, digest):
+        if digest not in self.bloom:
+            return None
+
+        keys = self.keys
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = middle * DIGEST_SIZE
+            key = keys[offset:offset + DIGEST_SIZE]
+            if key < digest:
+                low = middle + 1
+            elif key > digest:
+                high = middle
+            else:
+                return self.codes[middle]
+        return None
+
+
+class VerdictIndex:
+    """
+    Serves sha256 -> verdict lookups for whole USB inventories.
+
+    A full snapshot of HashVerdict is built on first use. Afterwards, rows
+    changed since the last check are pulled into a small overlay dict at
+    most every AGENT_HASH_VERDICT_REFRESH_INTERVAL seconds, and the
+    snapshot is rebuilt once the overlay grows past
+    AGENT_HASH_VERDICT_OVERLAY_LIMIT entries.
+
+    updated_at is set when a row is saved, not when it commits, so each
+    pull re-reads the last AGENT_HASH_VERDICT_PULL_LAG seconds before the
+    high-water mark to catch rows that committed late.
+    """
+
+    def __init__(self):
+        self.refresh_interval = settings.AGENT_HASH_VERDICT_REFRESH_INTERVAL
+        self.overlay_limit = settings.AGENT_HASH_VERDICT_OVERLAY_LIMIT
+        self.error_rate = settings.AGENT_HASH_VERDICT_BLOOM_ERROR_RATE
+        self.pull_lag = timedelta(seconds=settings.AGENT_HASH_VERDICT_PULL_LAG)
+        self._snapshot = None
+        self._overlay = {}
+        self._high_water = None
+        self._checked_at = 0.0
+        self._rebuild_pending = False
+        self._lock = threading.Lock()
+
+    def lookup_many(self, hashes):
+        """Return {sha256: verdict} for the hashes that have a verdict"""
+        self._refresh()
+
+        snapshot = self._snapshot
+        overlay = self._overlay
+        verdicts = {}
+
+        for sha256 in hashes:
+            code = overlay.get(sha256)
+            if code is None:
+                try:
+                    digest = bytes.fromhex(sha256)
+                except ValueError:
+                    continue
+                if len(digest) != DIGEST_SIZE:
+                    continue
+                code = snapshot.get(digest)
+            if code is not None:
+                verdicts[sha256] = VERDICT_NAMES[code]
+
+        return verdicts
+
+    def record(self, verdicts, source, detail=''):
+        """
+        Persist {sha256: verdict} decisions without overriding existing
+        verdicts, and make them visible to this process immediately.
+        """
+        if not verdicts:
+            return
+
+        HashVerdict.objects.bulk_create(
+            [
+                HashVerdict(sha256=sha256, verdict=verdict, source=source, detail=detail)
+                for sha256, verdict in verdicts.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+        # Rows that already existed (e.g. an analyst's clean verdict) were
+        # kept, so serve what the database holds rather than what was offered
+        hashes = list(verdicts)
+        stored = {}
+        for start in range(0, len(hashes), RECORD_CHUNK_SIZE):
+            stored.update(
+                HashVerdict.objects.filter(sha256__in=hashes[start:start + RECORD_CHUNK_SIZE])
+                .values_list('sha256', 'verdict')
+            )
+        with self._lock:
+            for sha256, verdict in stored.items():
+                self._overlay[sha256] = VERDICT_CODES[verdict]
+
+    def invalidate(self, rebuild=False):
+        if rebuild:
+            self._rebuild_pending = True
+        self._checked_at = 0.0
+
+    def _refresh(self):
+        if self._snapshot is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+
+        with self._lock:
+            if self._snapshot is None or self._rebuild_pending:
+                self._rebuild()
+            else:
+                self._pull_changes()
+            self._checked_at = time.monotonic()
+
+    def _rebuild(self):
+        high_water = HashVerdict.objects.aggregate(latest=Max('updated_at'))['latest']
+        rows = [
+            (bytes.fromhex(sha256), VERDICT_CODES[verdict])
+            for sha256, verdict in HashVerdict.objects.values_list('sha256', 'verdict').iterator(chunk_size=10000)
+            if is_sha256(sha256)
+        ]
+        self._snapshot = VerdictSnapshot(rows, self.error_rate)
+        self._overlay = {}
+        self._high_water = high_water
+        self._rebuild_pending = False
+        logger.info(f"Hash verdict snapshot built: entries={self._snapshot.count}")
+
+    def _pull_changes(self):
+        changed = HashVerdict.objects.all()
+        if self._high_water is not None:
+            changed = changed.filter(updated_at__gte=self._high_water - self.pull_lag)
+
+        overlay = dict(self._overlay)
+        for sha256, verdict, updated_at in changed.values_list('sha256', 'verdict', 'updated_at').iterator(chunk_size=10000):
+            overlay[sha256] = VERDICT_CODES[verdict]
+            if self._high_water is None or updated_at > self._high_water:
+                self._high_water = updated_at
+
+        if len(overlay) > self.overlay_limit:
+            self._rebuild()
+        else:
+            self._overlay = overlay
+
+
+verdict_index = VerdictIndex()
@@ -0,0 +1,265 @@
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections
+
+from whitehat_app.agent_cache import agent_cache
+from whitehat_app.agent_liveness import agent_liveness
+from whitehat_app.models import Agent, User
+from whitehat_app.usb_whitelist import usb_whitelist
+
+logger = logging.getLogger(__name__)
+
+# Columns refreshed on every heartbeat; created_at is only set on insert
+HEARTBEAT_UPDATE_FIELDS = ['user', 'hostname', 'os_type', 'status', 'ip_address', 'last_heartbeat']
+
+
+class UnknownUser(Exception):
+    """No user has the email a heartbeat names"""
+
+
+class _ExpiringLRU:
+    """Thread-safe LRU mapping whose entries expire after `ttl` seconds"""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def pop_value(self, value):
+        with self._lock:
+            for key in [key for key, (entry_value, _) in self._entries.items() if entry_value == value]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class HeartbeatWriter:
+    """
+    Coalesces agent heartbeats in a process-local buffer.
+
+    Each agent keeps only its latest heartbeat in the buffer, and a daemon
+    thread flushes the buffer every few seconds as one multi-row upsert.
+    The first heartbeat of an agent that is not in the database yet is
+    written through, so the row exists before the agent's other calls.
+
+    User pks are resolved from the heartbeat's email, and agents known to
+    exist are remembered, in LRU caches bounded and expired like
+    agent_cache. Signals only clear them in the current process: a
+    write-through that fails because the cached user was deleted elsewhere
+    forgets the email and retries once, and an agent deleted elsewhere is
+    buffered (and so re-created) for at most AGENT_CACHE_TTL seconds.
+    """
+
+    def __init__(self):
+        self.flush_interval = settings.AGENT_HEARTBEAT_FLUSH_INTERVAL
+        self.max_pending = settings.AGENT_HEARTBEAT_MAX_PENDING
+        self._pending = {}
+        # agent_id -> user pk of agents known to exist in the database
+        self._known_agents = _ExpiringLRU(settings.AGENT_CACHE_MAX_SIZE, settings.AGENT_CACHE_TTL)
+        # email -> user pk
+        self._user_ids = _ExpiringLRU(settings.AGENT_CACHE_MAX_SIZE, settings.AGENT_CACHE_TTL)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def resolve_user_id(self, email):
+        """Return the user pk for an email, or None if no such user exists"""
+        user_id = self._user_ids.get(email)
+        if user_id is None:
+            user_id = User.objects.filter(email=email).values_list('id', flat=True).first()
+            if user_id is not None:
+                self._user_ids.set(email, user_id)
+        return user_id
+
+    async def aresolve_user_id(self, email):
+        user_id = self._user_ids.get(email)
+        if user_id is None:
+            user_id = await User.objects.filter(email=email).values_list('id', flat=True).afirst()
+            if user_id is not None:
+                self._user_ids.set(email, user_id)
+        return user_id
+
+    def forget_user(self, email):
+        self._user_ids.pop(email)
+
+    def forget_user_id(self, user_id):
+        """Drop every email cached for a user pk, including one it no longer has"""
+        self._user_ids.pop_value(user_id)
+
+    def forget_agent(self, agent_id):
+        """Drop a deleted agent so its next heartbeat is written through, not buffered"""
+        self._known_agents.pop(agent_id)
+        with self._lock:
+            self._pending.pop(agent_id, None)
+
+    def record(self, agent_id, user_email, hostname, os_type, ip_address):
+        """
+        Record a heartbeat. Returns True when the agent row was created;
+        raises UnknownUser when no user has user_email.
+        """
+        user_id = self.resolve_user_id(user_email)
+        if user_id is None:
+            raise UnknownUser(user_email)
+
+        try:
+            return self._record(agent_id, user_id, hostname, os_type, ip_address)
+        except IntegrityError:
+            # The cached pk may belong to a user deleted or re-created in another process
+            self.forget_user(user_email)
+            user_id = self.resolve_user_id(user_email)
+            if user_id is None:
+                raise UnknownUser(user_email)
+            logger.warning(f"Retrying heartbeat with re-resolved user: agent_id={agent_id}, user_email={user_email}")
+            return self._record(agent_id, user_id, hostname, os_type, ip_address)
+
+    async def arecord(self, agent_id, user_email, hostname, os_type, ip_address):
+        user_id = await self.aresolve_user_id(user_email)
+        if user_id is None:
+            raise UnknownUser(user_email)
+
+        # Buffering never touches the database, only write-through does
+        if self.flush_interval <= 0 or self._known_agents.get(agent_id) != user_id:
+            return await sync_to_async(self.record)(agent_id, user_email, hostname, os_type, ip_address)
+        return self._record(agent_id, user_id, hostname, os_type, ip_address)
+
+    def _record(self, agent_id, user_id, hostname, os_type, ip_address):
+        agent = Agent(
+            agent_id=agent_id,
+            user_id=user_id,
+            hostname=hostname,
+            os_type=os_type,
+            status='online',
+            ip_address=ip_address,
+        )
+        agent_liveness.ensure_running()
+
+        if self.flush_interval <= 0 or self._known_agents.get(agent_id) != user_id:
+            return self._write_through(agent)
+
+        with self._lock:
+            self._pending[agent_id] = agent
+            pending_count = len(self._pending)
+
+        self._ensure_thread()
+        if pending_count >= self.max_pending:
+            self._wakeup.set()
+        return False
+
+    def flush(self):
+        with self._lock:
+            agents = list(self._pending.values())
+            self._pending = {}
+
+        if not agents:
+            return 0
+
+        # Bulk upserts send no post_save; look for agents this flush brings back online
+        previous = agent_liveness.heartbeat_states([agent.agent_id for agent in agents])
+
+        try:
+            Agent.objects.bulk_create(
+                agents,
+                update_conflicts=True,
+                unique_fields=['agent_id'],
+                update_fields=HEARTBEAT_UPDATE_FIELDS,
+            )
+        except IntegrityError:
+            # One bad row (e.g. its user was deleted) must not drop the whole batch
+            logger.warning(f"Heartbeat batch upsert failed, retrying {len(agents)} rows individually", exc_info=True)
+            for agent in agents:
+                try:
+                    self._upsert(agent)
+                except IntegrityError as e:
+                    self._known_agents.pop(agent.agent_id)
+                    logger.error(f"Dropping heartbeat for agent_id={agent.agent_id}: {str(e)}")
+
+        agent_cache.update_heartbeats(agents)
+        agent_liveness.heartbeats_written(previous)
+        logger.debug(f"Flushed {len(agents)} coalesced heartbeats")
+        return len(agents)
+
+    def _write_through(self, agent):
+        previous = agent_liveness.heartbeat_states([agent.agent_id])
+        created = self._upsert(agent)
+        agent_liveness.heartbeats_written(previous, [agent.agent_id] if created else ())
+        if not created and self._known_agents.get(agent.agent_id) != agent.user_id:
+            # The agent may have moved to another user since this process
+            # last saw it; usually this finds nothing to change. New agents
+            # are resolved by the Agent post_save signal.
+            usb_whitelist.sync_agent(agent.agent_id)
+        self._known_agents.set(agent.agent_id, agent.user_id)
+        return created
+
+    def _upsert(self, agent):
+        _, created = Agent.objects.update_or_create(
+            agent_id=agent.agent_id,
+            defaults={
+                'user_id': agent.user_id,
+                'hostname': agent.hostname,
+                'os_type': agent.os_type,
+                'status': agent.status,
+                'ip_address': agent.ip_address,
+            },
+        )
+        return created
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='heartbeat-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Heartbeat flush error: {str(e)}", exc_info=True)
+            finally:
+                close_old_connections()
+
+
+heartbeat_writer = HeartbeatWriter()
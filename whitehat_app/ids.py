@@ -0,0 +1,31 @@
+import os
+import time
+import uuid
+
+
+def uuid7():
+    """
+    Time-ordered UUID (RFC 9562 version 7).
+
+    The first 48 bits are the Unix time in milliseconds and the next 12
+    bits the sub-millisecond fraction, so ids created later sort after
+    earlier ones and new rows land at the right edge of the primary key
+    index instead of at random pages. The remaining 62 bits are random.
+    """
+    nanoseconds = time.time_ns()
+    milliseconds, remainder = divmod(nanoseconds, 1_000_000)
+    fraction = remainder * 4096 // 1_000_000
+    random_bits = int.from_bytes(os.urandom(8), 'big') & ((1 << 62) - 1)
+
+    value = (
+        (milliseconds & ((1 << 48) - 1)) << 80
+        | 0x7 << 76
+        | fraction << 64
+        | 0b10 << 62
+        | random_bits
+    )
+    return uuid.UUID(int=value)
+
+
+def new_upload_id():
+    return f"upload_{uuid7().hex}"
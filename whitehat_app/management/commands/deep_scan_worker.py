@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from whitehat_app.deep_scan import DeepScanner
+
+
+class Command(BaseCommand):
+    help = 'Scan completed file uploads against the active scan signatures in a worker process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Scan processes (default: AGENT_DEEP_SCAN_WORKERS)')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the scan queue is empty instead of polling for new uploads')
+
+    def handle(self, *args, **options):
+        scanner = DeepScanner(workers=options['workers'])
+        self.stdout.write(f'Deep scan worker started with {scanner.workers} processes')
+
+        scanner.run(once=options['once'])
+
+        self.stdout.write(self.style.SUCCESS('Deep scan queue drained'))
@@ -0,0 +1,94 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from whitehat_app.hash_verdicts import is_sha256
+from whitehat_app.models import HashVerdict
+
+
+class Command(BaseCommand):
+    help = 'Bulk load a sha256 hash feed (one hash per line, or the first CSV column) into HashVerdict'
+
+    def add_arguments(self, parser):
+        parser.add_argument('feed_file', type=str, help='Path to the hash feed file')
+        parser.add_argument(
+            '--verdict',
+            choices=[choice for choice, _ in HashVerdict.VERDICT_CHOICES],
+            default='malicious',
+            help='Verdict to record for every hash in the feed (default: malicious)'
+        )
+        parser.add_argument(
+            '--source',
+            choices=[choice for choice, _ in HashVerdict.SOURCE_CHOICES],
+            default='feed',
+            help='Source to record for the verdicts (default: feed)'
+        )
+        parser.add_argument('--detail', type=str, default='', help='Free-form note, e.g. the feed name')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk upsert')
+
+    def handle(self, *args, **options):
+        feed_file = options['feed_file']
+        verdict = options['verdict']
+        source = options['source']
+        detail = options['detail']
+        batch_size = options['batch_size']
+
+        self.stdout.write(f'Loading {verdict} hashes from {feed_file}...')
+
+        loaded_count = 0
+        skipped_count = 0
+        kept_count = 0
+        batch = {}
+
+        try:
+            with open(feed_file, 'r', encoding='utf-8') as file:
+                for row in csv.reader(file):
+                    if not row or row[0].startswith('#'):
+                        continue
+
+                    sha256 = row[0].strip().lower()
+                    if not is_sha256(sha256):
+                        skipped_count += 1
+                        continue
+
+                    batch[sha256] = HashVerdict(sha256=sha256, verdict=verdict, source=source, detail=detail)
+                    if len(batch) >= batch_size:
+                        kept_count += self._keep_analyst_verdicts(batch, source)
+                        loaded_count += self._upsert(batch)
+                        self.stdout.write(f'Loaded {loaded_count} hashes so far...')
+                        batch = {}
+
+                if batch:
+                    kept_count += self._keep_analyst_verdicts(batch, source)
+                    loaded_count += self._upsert(batch)
+        except OSError as e:
+            raise CommandError(f'Cannot read {feed_file}: {e}')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully loaded {loaded_count} hashes. Skipped {skipped_count} invalid rows. '
+                f'Kept {kept_count} analyst verdicts.'
+            )
+        )
+
+    def _keep_analyst_verdicts(self, batch, source):
+        """Drop hashes an analyst already decided from batch, like deep_scan does"""
+        if source == 'analyst':
+            return 0
+        decided = HashVerdict.objects.filter(sha256__in=list(batch), source='analyst').values_list('sha256', flat=True)
+        kept = 0
+        for sha256 in decided:
+            del batch[sha256]
+            kept += 1
+        return kept
+
+    def _upsert(self, batch):
+        # Feeds override earlier automated verdicts for the same hash
+        if not batch:
+            return 0
+        HashVerdict.objects.bulk_create(
+            list(batch.values()),
+            update_conflicts=True,
+            unique_fields=['sha256'],
+            update_fields=['verdict', 'source', 'detail', 'updated_at'],
+        )
+        return len(batch)
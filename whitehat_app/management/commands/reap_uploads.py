@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from whitehat_app.upload_lifecycle import upload_reaper
+
+
+class Command(BaseCommand):
+    help = 'Expire stale pending file uploads and remove their orphaned objects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Keep running, one pass every N seconds (default: run once)')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+
+        while True:
+            expired, removed = upload_reaper.reap()
+            self.stdout.write(self.style.SUCCESS(
+                f'Expired {expired} uploads. Issued {removed} object deletions.'
+            ))
+
+            if interval <= 0:
+                break
+            time.sleep(interval)
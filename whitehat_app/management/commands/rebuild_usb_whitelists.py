@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from whitehat_app.usb_whitelist import usb_whitelist
+
+
+class Command(BaseCommand):
+    help = "Re-resolve every agent's effective USB whitelist from the whitelist entries"
+
+    def handle(self, *args, **options):
+        changed = usb_whitelist.sync_all()
+        self.stdout.write(self.style.SUCCESS(f'Updated the whitelist of {changed} agents.'))
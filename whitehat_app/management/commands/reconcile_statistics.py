@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from whitehat_app.fleet_stats import fleet_stats
+
+
+class Command(BaseCommand):
+    help = 'Recount uploads into the incrementally maintained dashboard counters'
+
+    def handle(self, *args, **options):
+        counts = fleet_stats.reconcile()
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled upload counters: {', '.join(f'{name}={value}' for name, value in counts.items())}"
+        ))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from whitehat_app.agent_liveness import agent_liveness
+
+
+class Command(BaseCommand):
+    help = 'Mark agents that stopped sending heartbeats as offline and close their uptime spans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Keep running, one pass every N seconds (default: run once)')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+
+        while True:
+            swept = agent_liveness.sweep()
+            self.stdout.write(self.style.SUCCESS(f'Marked {swept} agents offline.'))
+
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0004_remove_log_whitehat_ap_timesta_e44c2b_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offlineevent',
+            name='client_event_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='offlineevent',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_event_id__isnull', False)), fields=('agent', 'client_event_id'), name='uniq_offline_event_client_id'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0006_agentcommand'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilePolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('enforce_acl', models.BooleanField(default=True)),
+                ('deep_scan_extensions', models.JSONField(blank=True, default=list)),
+                ('quarantine_extensions', models.JSONField(blank=True, default=list)),
+                ('deep_scan_path_globs', models.JSONField(blank=True, default=list)),
+                ('quarantine_path_globs', models.JSONField(blank=True, default=list)),
+                ('blocked_hashes', models.JSONField(blank=True, default=list)),
+                ('allowed_hashes', models.JSONField(blank=True, default=list)),
+                ('max_upload_size', models.BigIntegerField(default=52428800)),
+                ('oversize_action', models.CharField(choices=[('allow', 'Allow'), ('quarantine', 'Quarantine')], default='quarantine', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'file policies',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
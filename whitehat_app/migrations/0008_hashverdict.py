@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0007_filepolicy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HashVerdict',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('verdict', models.CharField(choices=[('malicious', 'Malicious'), ('suspicious', 'Suspicious'), ('clean', 'Clean')], max_length=20)),
+                ('source', models.CharField(choices=[('feed', 'Known-bad feed'), ('agent_vt', 'Agent VirusTotal result'), ('deep_scan', 'Server deep scan'), ('analyst', 'Analyst')], max_length=20)),
+                ('detail', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
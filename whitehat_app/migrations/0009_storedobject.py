@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0008_hashverdict'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredObject',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('bucket', models.CharField(max_length=255)),
+                ('object_name', models.TextField()),
+                ('size', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('verified_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='fileupload',
+            name='deduplicated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='fileupload',
+            name='stored_object',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploads', to='whitehat_app.storedobject'),
+        ),
+    ]
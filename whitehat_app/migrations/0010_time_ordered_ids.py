@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:13
+
+import whitehat_app.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0009_storedobject'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='agentcommand',
+            name='id',
+            field=models.UUIDField(default=whitehat_app.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='id',
+            field=models.UUIDField(default=whitehat_app.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='fileupload',
+            name='upload_id',
+            field=models.CharField(default=whitehat_app.ids.new_upload_id, max_length=255, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='incident',
+            name='id',
+            field=models.UUIDField(default=whitehat_app.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='log',
+            name='id',
+            field=models.UUIDField(default=whitehat_app.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
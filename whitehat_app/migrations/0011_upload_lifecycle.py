@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:13
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_finished_at(apps, schema_editor):
+    FileUpload = apps.get_model('whitehat_app', 'FileUpload')
+    FileUpload.objects.filter(status='completed', finished_at__isnull=True).update(finished_at=F('completed_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0010_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileupload',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='fileupload',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('uploading', 'Uploading'), ('completed', 'Completed'), ('failed', 'Failed'), ('expired', 'Expired')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='fileupload',
+            index=models.Index(fields=['status', 'created_at'], name='whitehat_ap_status_c750aa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileupload',
+            index=models.Index(fields=['finished_at'], name='whitehat_ap_finishe_6984c8_idx'),
+        ),
+        migrations.RunPython(backfill_finished_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0011_upload_lifecycle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('pattern', models.TextField()),
+                ('pattern_type', models.CharField(choices=[('text', 'Text'), ('hex', 'Hex')], default='text', max_length=10)),
+                ('verdict', models.CharField(choices=[('malicious', 'Malicious'), ('suspicious', 'Suspicious')], default='malicious', max_length=20)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='fileupload',
+            name='scan_result',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='fileupload',
+            name='scan_status',
+            field=models.CharField(blank=True, choices=[('queued', 'Queued'), ('scanning', 'Scanning'), ('clean', 'Clean'), ('suspicious', 'Suspicious'), ('malicious', 'Malicious'), ('error', 'Error')], db_index=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='fileupload',
+            name='scanned_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0012_deep_scan'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fileupload',
+            index=models.Index(fields=['created_at'], name='whitehat_ap_created_7c547f_idx'),
+        ),
+    ]
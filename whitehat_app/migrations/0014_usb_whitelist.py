@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0013_upload_admission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UsbWhitelistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vendor_id', models.CharField(max_length=4)),
+                ('product_id', models.CharField(max_length=4)),
+                ('serial_number', models.CharField(blank=True, default='', max_length=255)),
+                ('description', models.CharField(blank=True, default='', max_length=255)),
+                ('is_active', models.BooleanField(default=True)),
+                ('version', models.BigIntegerField(db_index=True, default=0, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'USB whitelist entries',
+                'unique_together': {('vendor_id', 'product_id', 'serial_number')},
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0014_usb_whitelist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentWhitelistDevice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vendor_id', models.CharField(max_length=4)),
+                ('product_id', models.CharField(max_length=4)),
+                ('serial_number', models.CharField(blank=True, default='', max_length=255)),
+                ('description', models.CharField(blank=True, default='', max_length=255)),
+                ('is_active', models.BooleanField(default=True)),
+                ('version', models.BigIntegerField()),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='usbwhitelistentry',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='usbwhitelistentry',
+            name='agent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='usb_whitelist_entries', to='whitehat_app.agent'),
+        ),
+        migrations.AddField(
+            model_name='usbwhitelistentry',
+            name='scope',
+            field=models.CharField(choices=[('global', 'Global'), ('user', 'User'), ('agent', 'Agent')], default='global', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='usbwhitelistentry',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='usb_whitelist_entries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='usbwhitelistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('scope', 'global')), fields=('vendor_id', 'product_id', 'serial_number'), name='unique_global_usb_whitelist_entry'),
+        ),
+        migrations.AddConstraint(
+            model_name='usbwhitelistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('scope', 'user')), fields=('user', 'vendor_id', 'product_id', 'serial_number'), name='unique_user_usb_whitelist_entry'),
+        ),
+        migrations.AddConstraint(
+            model_name='usbwhitelistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('scope', 'agent')), fields=('agent', 'vendor_id', 'product_id', 'serial_number'), name='unique_agent_usb_whitelist_entry'),
+        ),
+        migrations.AddField(
+            model_name='agentwhitelistdevice',
+            name='agent',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='whitelist_devices', to='whitehat_app.agent'),
+        ),
+        migrations.AddIndex(
+            model_name='agentwhitelistdevice',
+            index=models.Index(fields=['agent', 'version'], name='whitehat_ap_agent_i_f54373_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='agentwhitelistdevice',
+            unique_together={('agent', 'vendor_id', 'product_id', 'serial_number')},
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0015_scoped_usb_whitelist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatisticsCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0016_statistics_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agent',
+            index=models.Index(fields=['created_at', 'agent_id'], name='whitehat_ap_created_f4bce3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agent',
+            index=models.Index(fields=['status', 'created_at'], name='whitehat_ap_status_62cb6a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agent',
+            index=models.Index(fields=['user', 'created_at'], name='whitehat_ap_user_id_0f3c82_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fileupload',
+            index=models.Index(fields=['agent', 'created_at'], name='whitehat_ap_agent_i_b02461_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offlineevent',
+            index=models.Index(fields=['created_at', 'id'], name='whitehat_ap_created_34fbed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offlineevent',
+            index=models.Index(fields=['agent', 'created_at'], name='whitehat_ap_agent_i_5a4b4c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offlineevent',
+            index=models.Index(fields=['event_type', 'created_at'], name='whitehat_ap_event_t_e5258b_idx'),
+        ),
+    ]
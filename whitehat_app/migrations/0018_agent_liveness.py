@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-17 07:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def open_live_spans(apps, schema_editor):
+    Agent = apps.get_model('whitehat_app', 'Agent')
+    AgentUptimeSpan = apps.get_model('whitehat_app', 'AgentUptimeSpan')
+    AgentUptimeSpan.objects.bulk_create(
+        [
+            AgentUptimeSpan(agent_id=agent_id, started_at=last_heartbeat)
+            for agent_id, last_heartbeat in Agent.objects.filter(status__in=['online', 'suspicious']).values_list('agent_id', 'last_heartbeat')
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0017_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentUptimeSpan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='agent',
+            index=models.Index(fields=['status', 'last_heartbeat'], name='whitehat_ap_status_167b5c_idx'),
+        ),
+        migrations.AddField(
+            model_name='agentuptimespan',
+            name='agent',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uptime_spans', to='whitehat_app.agent'),
+        ),
+        migrations.AddIndex(
+            model_name='agentuptimespan',
+            index=models.Index(fields=['agent', 'ended_at'], name='whitehat_ap_agent_i_76cc28_idx'),
+        ),
+        migrations.RunPython(open_live_spans, migrations.RunPython.noop),
+    ]
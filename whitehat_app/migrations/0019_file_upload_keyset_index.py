@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whitehat_app', '0018_agent_liveness'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='fileupload',
+            name='whitehat_ap_created_7c547f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='fileupload',
+            index=models.Index(fields=['created_at', 'upload_id'], name='whitehat_ap_created_a27143_idx'),
+        ),
+    ]
@@ -1,62 +1,248 @@
-from io import BytesIO
+import hashlib
+import logging
+import uuid
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.http import StreamingHttpResponse, HttpResponse
+from django.utils.http import http_date, parse_http_date_safe
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from whitehat_app.minio_service import minio_service
+from whitehat_app.content_store import content_store, content_hash_for, staging_object_name
+from whitehat_app.storage import ObjectNotFound, storage
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class HashingReader:
+    """
+    File-like view of the request body that counts and hashes the bytes
+    as storage reads them in parts.
+
+    Under ASGI, Django has already spooled the body to a temporary file
+    (kept in memory only up to FILE_UPLOAD_MAX_MEMORY_SIZE) before the view
+    runs, so this bounds memory, not disk: the upload is written to local
+    disk once and then copied to storage part by part.
+    """
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.limit = limit
+        self.size = 0
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self.size += len(chunk)
+        if self.size > self.limit:
+            raise UploadTooLarge()
+        self.digest.update(chunk)
+        return chunk
+
+
+def _stream_to_object(request, bucket, object_name, reader, length):
+    storage.put(
+        bucket,
+        object_name,
+        reader,
+        length=length,
+        content_type=request.content_type or 'application/octet-stream',
+        part_size=settings.MINIO_PROXY_PART_SIZE
+    )
+
+
+async def _stream_chunks(chunks):
+    """
+    Serve a storage chunk iterator as an async iterator.
+
+    Under ASGI, Django reads a sync iterator into memory before sending
+    the first byte; reading each chunk in a worker thread instead keeps at
+    most one chunk of a download in memory.
+    """
+    read_chunk = sync_to_async(next, thread_sensitive=False)
+    try:
+        while True:
+            chunk = await read_chunk(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        # Releases the file or the MinIO connection
+        await sync_to_async(chunks.close, thread_sensitive=False)()
+
+
+def _set_validators(http_response, etag, last_modified):
+    http_response['ETag'] = etag
+    http_response['Accept-Ranges'] = 'bytes'
+    if last_modified is not None:
+        http_response['Last-Modified'] = http_date(last_modified.timestamp())
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return (
+        if_modified_since is not None
+        and last_modified is not None
+        and int(last_modified.timestamp()) <= if_modified_since
+    )
+
+
+def _parse_range(header, size):
+    """
+    Return (start, end) for a single satisfiable byte range, 'unsatisfiable',
+    or None to serve the whole object. Multi-range requests get the whole
+    object, which RFC 9110 allows.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header or size == 0:
+        return None
+
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            suffix = int(last)
+            if suffix <= 0:
+                return 'unsatisfiable'
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        return 'unsatisfiable'
+    if start > end:
+        return None
+    return start, min(end, size - 1)
 
 
 @csrf_exempt
 @require_http_methods(["GET", "PUT", "POST", "HEAD"])
 def minio_proxy(request, bucket, object_name):
-    minio_service._ensure_client()
-
-    if not minio_service.client:
-        return HttpResponse('Minio unavailable', status=503)
+    if not storage.is_available():
+        return HttpResponse('Storage unavailable', status=503)
 
     if request.method == 'PUT' or request.method == 'POST':
+        content_length = request.META.get('CONTENT_LENGTH')
+        length = -1
+        if content_length:
+            try:
+                length = int(content_length)
+            except ValueError:
+                length = None
+            if length is None or length < 0:
+                return HttpResponse('invalid_content_length', status=400)
+        if length > settings.MINIO_PROXY_MAX_UPLOAD_SIZE:
+            return HttpResponse('upload_too_large', status=413)
+
+        reader = HashingReader(request, settings.MINIO_PROXY_MAX_UPLOAD_SIZE)
+        sha256 = content_hash_for(object_name)
+
         try:
-            file_data = request.body
-            file_obj = BytesIO(file_data)
+            if not sha256:
+                _stream_to_object(request, bucket, object_name, reader, length)
+                return HttpResponse(status=200)
 
-            minio_service.client.put_object(
-                bucket,
-                object_name,
-                file_obj,
-                length=len(file_data),
-                content_type=request.content_type or 'application/octet-stream'
-            )
+            # Content-addressed objects are staged under a temporary name and
+            # only copied into place once the streamed hash matches, so a bad
+            # upload never replaces verified content
+            staging_name = staging_object_name(uuid.uuid4().hex)
+            _stream_to_object(request, bucket, staging_name, reader, length)
 
+            try:
+                if reader.digest.hexdigest() != sha256:
+                    logger.warning(f"Upload does not match its hash: object_name={object_name}, actual={reader.digest.hexdigest()}")
+                    return HttpResponse('hash_mismatch', status=400)
+
+                storage.copy(bucket, staging_name, object_name)
+            finally:
+                storage.remove(bucket, staging_name)
+
+            content_store.record(sha256, bucket, object_name, reader.size)
             return HttpResponse(status=200)
 
+        except UploadTooLarge:
+            return HttpResponse('upload_too_large', status=413)
         except Exception as e:
             return HttpResponse(str(e), status=500)
 
     elif request.method == 'GET':
         try:
-            response = minio_service.client.get_object(bucket, object_name)
-
-            def file_iterator():
-                for chunk in response.stream(chunk_size=8192):
-                    yield chunk
+            stat = storage.stat(bucket, object_name)
+        except ObjectNotFound as e:
+            content_store.object_missing(object_name)
+            return HttpResponse(str(e), status=404)
+        except Exception as e:
+            return HttpResponse(str(e), status=404)
 
-            http_response = StreamingHttpResponse(
-                file_iterator(),
-                content_type='application/octet-stream'
-            )
+        etag = f'"{stat.etag}"'
+        if _not_modified(request, etag, stat.last_modified):
+            http_response = HttpResponse(status=304)
+            _set_validators(http_response, etag, stat.last_modified)
+            return http_response
 
-            filename = object_name.split('/')[-1]
-            http_response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        byte_range = None
+        if_range = request.headers.get('If-Range')
+        if if_range is None or if_range == etag:
+            byte_range = _parse_range(request.headers.get('Range'), stat.size)
 
+        if byte_range == 'unsatisfiable':
+            http_response = HttpResponse(status=416)
+            http_response['Content-Range'] = f'bytes */{stat.size}'
             return http_response
 
+        filename = object_name.split('/')[-1]
+        accel_redirect = None if byte_range else storage.accel_redirect(bucket, object_name)
+
+        try:
+            if accel_redirect:
+                # The front proxy sends the file itself; ASGI has no sendfile
+                http_response = HttpResponse(content_type='application/octet-stream')
+                http_response['X-Accel-Redirect'] = accel_redirect
+            else:
+                if byte_range:
+                    start, end = byte_range
+                    chunks = storage.iter_chunks(bucket, object_name, settings.MINIO_PROXY_DOWNLOAD_CHUNK_SIZE, offset=start, length=end - start + 1)
+                else:
+                    chunks = storage.iter_chunks(bucket, object_name, settings.MINIO_PROXY_DOWNLOAD_CHUNK_SIZE)
+                http_response = StreamingHttpResponse(
+                    _stream_chunks(chunks),
+                    content_type='application/octet-stream'
+                )
         except Exception as e:
             return HttpResponse(str(e), status=404)
 
+        _set_validators(http_response, etag, stat.last_modified)
+
+        if byte_range:
+            start, end = byte_range
+            http_response.status_code = 206
+            http_response['Content-Range'] = f'bytes {start}-{end}/{stat.size}'
+            http_response['Content-Length'] = str(end - start + 1)
+        elif not accel_redirect:
+            http_response['Content-Length'] = str(stat.size)
+
+        http_response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+        return http_response
+
     elif request.method == 'HEAD':
         try:
-            minio_service.client.stat_object(bucket, object_name)
-            return HttpResponse(status=200)
+            stat = storage.stat(bucket, object_name)
         except:
             return HttpResponse(status=404)
 
+        http_response = HttpResponse(status=200)
+        _set_validators(http_response, f'"{stat.etag}"', stat.last_modified)
+        http_response['Content-Length'] = str(stat.size)
+        return http_response
+
     return HttpResponse('Method not allowed', status=405)
@@ -1,6 +1,9 @@
 import uuid
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from whitehat_app.ids import uuid7, new_upload_id
 
 
 # Common severity/risk level choices used across multiple models
@@ -88,7 +91,7 @@ class Event(models.Model):
         ('usb_connect', 'USB Connect'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=True)
     event_type = models.CharField(max_length=50, choices=EVENT_TYPES)
     event_data = models.JSONField()
@@ -104,7 +107,7 @@ class Event(models.Model):
 class Incident(models.Model):
     SEVERITY_CHOICES = SEVERITY_RISK_CHOICES
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=True)
     incident_type = models.CharField(max_length=255)
     severity = models.CharField(max_length=50, choices=SEVERITY_CHOICES)
@@ -146,19 +149,70 @@ class Agent(models.Model):
     last_heartbeat = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Keyset pagination of the agent list, unfiltered and by filter
+        indexes = [
+            models.Index(fields=['created_at', 'agent_id']),
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['user', 'created_at']),
+            # Liveness sweeps: live agents whose last heartbeat is older than a cutoff
+            models.Index(fields=['status', 'last_heartbeat']),
+        ]
+
     def __str__(self):
         return f"{self.agent_id} - {self.hostname}"
 
 
+class AgentUptimeSpan(models.Model):
+    """
+    One stretch of time an agent was heartbeating. ended_at stays null
+    while the agent is live and is set to its last heartbeat once the
+    liveness sweeper finds it silent; see agent_liveness.
+    """
+    agent = models.ForeignKey(Agent, on_delete=models.CASCADE, related_name='uptime_spans')
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['agent', 'ended_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.agent_id}: {self.started_at} - {self.ended_at or 'now'}"
+
+
+class StoredObject(models.Model):
+    """A stored upload, addressed by the sha256 of its content"""
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    bucket = models.CharField(max_length=255)
+    object_name = models.TextField()
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    verified_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.sha256} - {self.size} bytes"
+
+
 class FileUpload(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('uploading', 'Uploading'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+    SCAN_STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('scanning', 'Scanning'),
+        ('clean', 'Clean'),
+        ('suspicious', 'Suspicious'),
+        ('malicious', 'Malicious'),
+        ('error', 'Error'),
     ]
 
-    upload_id = models.CharField(max_length=255, unique=True, primary_key=True)
+    upload_id = models.CharField(max_length=255, unique=True, primary_key=True, default=new_upload_id)
     agent = models.ForeignKey(Agent, on_delete=models.CASCADE, db_index=True)
     file_path = models.TextField()
     file_size = models.BigIntegerField()
@@ -166,13 +220,28 @@ class FileUpload(models.Model):
     minio_url = models.TextField()
     bucket = models.CharField(max_length=255)
     object_name = models.TextField()
+    stored_object = models.ForeignKey(StoredObject, on_delete=models.SET_NULL, null=True, blank=True, related_name='uploads')
+    deduplicated = models.BooleanField(default=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     error_message = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    # Set when the upload reaches any final state (completed, failed, expired)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Server-side deep scan of completed uploads, see whitehat_app.deep_scan
+    scan_status = models.CharField(max_length=20, choices=SCAN_STATUS_CHOICES, null=True, blank=True, db_index=True)
+    scan_result = models.JSONField(null=True, blank=True)
+    scanned_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            # Keyset pagination of the upload list orders by (created_at, upload_id)
+            models.Index(fields=['created_at', 'upload_id']),
+            models.Index(fields=['finished_at']),
+            models.Index(fields=['agent', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.upload_id} - {self.file_path}"
@@ -183,22 +252,283 @@ class OfflineEvent(models.Model):
     event_type = models.CharField(max_length=50)
     payload = models.JSONField()
     timestamp = models.BigIntegerField()
+    client_event_id = models.CharField(max_length=64, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        constraints = [
+            # Agents retry offline submissions; the per-event client id makes retries idempotent
+            models.UniqueConstraint(
+                fields=['agent', 'client_event_id'],
+                condition=models.Q(client_event_id__isnull=False),
+                name='uniq_offline_event_client_id',
+            ),
+        ]
+        # Keyset pagination of the offline event list, unfiltered and by filter
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['agent', 'created_at']),
+            models.Index(fields=['event_type', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.agent.agent_id} - {self.event_type}"
 
 
+class AgentCommand(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('delivered', 'Delivered'),
+        ('acknowledged', 'Acknowledged'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    agent = models.ForeignKey(Agent, on_delete=models.CASCADE, db_index=True)
+    command_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField(null=True, blank=True)
+    error_message = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    acknowledged_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['agent', 'status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.agent_id} - {self.command_type} - {self.status}"
+
+
+class FilePolicy(models.Model):
+    """
+    One version of the USB file policy. The newest active row is the policy
+    in force; older rows are kept as history. Extensions are lowercase with
+    a leading dot, globs match the relpath reported by the agent.
+    """
+    OVERSIZE_ACTION_CHOICES = [
+        ('allow', 'Allow'),
+        ('quarantine', 'Quarantine'),
+    ]
+
+    name = models.CharField(max_length=255)
+    is_active = models.BooleanField(default=True, db_index=True)
+    enforce_acl = models.BooleanField(default=True)
+    deep_scan_extensions = models.JSONField(default=list, blank=True)
+    quarantine_extensions = models.JSONField(default=list, blank=True)
+    deep_scan_path_globs = models.JSONField(default=list, blank=True)
+    quarantine_path_globs = models.JSONField(default=list, blank=True)
+    blocked_hashes = models.JSONField(default=list, blank=True)
+    allowed_hashes = models.JSONField(default=list, blank=True)
+    max_upload_size = models.BigIntegerField(default=52428800)  # 50MB
+    oversize_action = models.CharField(max_length=20, choices=OVERSIZE_ACTION_CHOICES, default='quarantine')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name_plural = 'file policies'
+
+    def __str__(self):
+        return f"v{self.id} - {self.name}"
+
+
+class HashVerdict(models.Model):
+    VERDICT_CHOICES = [
+        ('malicious', 'Malicious'),
+        ('suspicious', 'Suspicious'),
+        ('clean', 'Clean'),
+    ]
+    SOURCE_CHOICES = [
+        ('feed', 'Known-bad feed'),
+        ('agent_vt', 'Agent VirusTotal result'),
+        ('deep_scan', 'Server deep scan'),
+        ('analyst', 'Analyst'),
+    ]
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    verdict = models.CharField(max_length=20, choices=VERDICT_CHOICES)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    detail = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.sha256} - {self.verdict}"
+
+
+class ScanSignature(models.Model):
+    """
+    Byte signature matched by the deep-scan workers. Text patterns are
+    matched as their UTF-8 bytes, hex patterns as the bytes they spell.
+    """
+    PATTERN_TYPE_CHOICES = [
+        ('text', 'Text'),
+        ('hex', 'Hex'),
+    ]
+    VERDICT_CHOICES = [
+        ('malicious', 'Malicious'),
+        ('suspicious', 'Suspicious'),
+    ]
+
+    name = models.CharField(max_length=255)
+    pattern = models.TextField()
+    pattern_type = models.CharField(max_length=10, choices=PATTERN_TYPE_CHOICES, default='text')
+    verdict = models.CharField(max_length=20, choices=VERDICT_CHOICES, default='malicious')
+    is_active = models.BooleanField(default=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} - {self.verdict}"
+
+
+class SyncCounter(models.Model):
+    """
+    Version counter of a document agents sync incrementally. next() locks
+    the row until the caller's transaction commits, so versions become
+    visible in the order they were handed out and a reader that has seen
+    version N never later finds a change numbered N or below.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def next(cls, name):
+        with transaction.atomic():
+            cls.objects.get_or_create(name=name)
+            counter = cls.objects.select_for_update().get(name=name)
+            counter.value += 1
+            counter.save(update_fields=['value'])
+            return counter.value
+
+    @classmethod
+    def current(cls, name):
+        return cls.objects.filter(name=name).values_list('value', flat=True).first() or 0
+
+    def __str__(self):
+        return f"{self.name} - {self.value}"
+
+
+class StatisticsCounter(models.Model):
+    """
+    Running count behind the dashboard statistics when they are maintained
+    incrementally (AGENT_STATS_INCREMENTAL); see fleet_stats.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} - {self.value}"
+
+
+class UsbWhitelistEntry(models.Model):
+    """
+    USB device agents allow without prompting, for every agent (global),
+    the agents of one user, or a single agent. An empty serial_number
+    allows every device with that vendor and product id.
+
+    Entries are deactivated rather than deleted: each save takes a new
+    version from the 'usb_whitelist' SyncCounter, and the effective
+    whitelist of every agent in the entry's scope is re-resolved for that
+    device into AgentWhitelistDevice within the same transaction.
+    """
+    SCOPE_CHOICES = [
+        ('global', 'Global'),
+        ('user', 'User'),
+        ('agent', 'Agent'),
+    ]
+
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES, default='global')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='usb_whitelist_entries')
+    agent = models.ForeignKey(Agent, on_delete=models.CASCADE, null=True, blank=True, related_name='usb_whitelist_entries')
+    vendor_id = models.CharField(max_length=4)
+    product_id = models.CharField(max_length=4)
+    serial_number = models.CharField(max_length=255, blank=True, default='')
+    description = models.CharField(max_length=255, blank=True, default='')
+    is_active = models.BooleanField(default=True)
+    version = models.BigIntegerField(default=0, db_index=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['vendor_id', 'product_id', 'serial_number'],
+                condition=models.Q(scope='global'),
+                name='unique_global_usb_whitelist_entry',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'vendor_id', 'product_id', 'serial_number'],
+                condition=models.Q(scope='user'),
+                name='unique_user_usb_whitelist_entry',
+            ),
+            models.UniqueConstraint(
+                fields=['agent', 'vendor_id', 'product_id', 'serial_number'],
+                condition=models.Q(scope='agent'),
+                name='unique_agent_usb_whitelist_entry',
+            ),
+        ]
+        verbose_name_plural = 'USB whitelist entries'
+
+    def clean(self):
+        if self.scope == 'user' and (self.user_id is None or self.agent_id is not None):
+            raise ValidationError('User-scoped entries need a user and no agent.')
+        if self.scope == 'agent' and (self.agent_id is None or self.user_id is not None):
+            raise ValidationError('Agent-scoped entries need an agent and no user.')
+        if self.scope == 'global' and (self.user_id is not None or self.agent_id is not None):
+            raise ValidationError('Global entries take neither a user nor an agent.')
+
+    def save(self, *args, **kwargs):
+        self.vendor_id = self.vendor_id.lower()
+        self.product_id = self.product_id.lower()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        with transaction.atomic():
+            self.version = SyncCounter.next('usb_whitelist')
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.scope}: {self.vendor_id}:{self.product_id} {self.serial_number or '*'} - {self.description}"
+
+
+class AgentWhitelistDevice(models.Model):
+    """
+    One device of an agent's effective USB whitelist, resolved from the
+    global, user and agent scoped UsbWhitelistEntry rows; the most specific
+    active entry provides the description. Removed devices stay as
+    inactive rows so agents syncing with since_version learn about them.
+    """
+    agent = models.ForeignKey(Agent, on_delete=models.CASCADE, related_name='whitelist_devices')
+    vendor_id = models.CharField(max_length=4)
+    product_id = models.CharField(max_length=4)
+    serial_number = models.CharField(max_length=255, blank=True, default='')
+    description = models.CharField(max_length=255, blank=True, default='')
+    is_active = models.BooleanField(default=True)
+    version = models.BigIntegerField()
+
+    class Meta:
+        unique_together = [['agent', 'vendor_id', 'product_id', 'serial_number']]
+        indexes = [
+            models.Index(fields=['agent', 'version']),
+        ]
+
+    def __str__(self):
+        return f"{self.agent_id} - {self.vendor_id}:{self.product_id} {self.serial_number or '*'}"
+
+
 class Log(models.Model):
     REQUEST_STATUS_CHOICES = [
         ('success', 'Success'),
         ('failed', 'Failed'),
     ]
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     timestamp = models.DateTimeField(db_index=True)
     employee_id = models.CharField(max_length=50, db_index=True)
     session_id = models.CharField(max_length=255)
@@ -0,0 +1,111 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, inline_serializer
+from rest_framework import serializers
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first pages keyed on (created_at, pk).
+
+    Each page is one indexed range read: the cursor holds the created_at
+    and primary key of the last row served, and the next page starts
+    strictly after it, so pages stay stable while rows are inserted and no
+    COUNT(*) or OFFSET is ever run. page_size defaults to
+    AGENT_LIST_PAGE_SIZE and is capped at AGENT_LIST_MAX_PAGE_SIZE.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by('-created_at', '-pk')
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor, queryset.model)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+        # One row past the page tells whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        page = rows[:self.page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if len(rows) > self.page_size else None
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, settings.AGENT_LIST_PAGE_SIZE))
+        except ValueError:
+            page_size = settings.AGENT_LIST_PAGE_SIZE
+        return min(max(page_size, 1), settings.AGENT_LIST_MAX_PAGE_SIZE)
+
+    def encode_cursor(self, row):
+        position = json.dumps([row.created_at.isoformat(), str(row.pk)])
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        """(created_at, pk) of a cursor, both checked against model so a tampered cursor is a 400, not a query error"""
+        try:
+            created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            created_at = datetime.fromisoformat(created_at)
+            pk = model._meta.pk.to_python(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidCursor(cursor)
+
+        if pk is None or timezone.is_naive(created_at):
+            raise InvalidCursor(cursor)
+        return created_at, pk
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        })
+
+
+KEYSET_PAGINATION_PARAMETERS = [
+    OpenApiParameter(
+        name='cursor',
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description='next_cursor of the previous page'
+    ),
+    OpenApiParameter(
+        name='page_size',
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description='Rows per page'
+    ),
+]
+
+
+def keyset_page_schema(name, serializer):
+    return inline_serializer(name=name, fields={
+        'next': serializers.URLField(allow_null=True),
+        'next_cursor': serializers.CharField(allow_null=True),
+        'results': serializer(many=True),
+    })
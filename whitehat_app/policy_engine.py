@@ -0,0 +1,202 @@
+import fnmatch
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from whitehat_app.hash_verdicts import is_sha256
+from whitehat_app.models import FilePolicy
+
+logger = logging.getLogger(__name__)
+
+# Policy in force when no FilePolicy row is active
+DEFAULT_POLICY = {
+    'id': 0,
+    'enforce_acl': True,
+    'deep_scan_extensions': ['.exe', '.ps1', '.bat', '.vbs', '.scr', '.com', '.pif'],
+    'quarantine_extensions': [],
+    'deep_scan_path_globs': [],
+    'quarantine_path_globs': [],
+    'blocked_hashes': [],
+    'allowed_hashes': [],
+    'max_upload_size': 52428800,  # 50MB
+    'oversize_action': 'quarantine',
+}
+
+
+def _normalize_extensions(extensions):
+    normalized = set()
+    for ext in extensions:
+        ext = ext.strip().lower()
+        if ext:
+            normalized.add(ext if ext.startswith('.') else f'.{ext}')
+    return frozenset(normalized)
+
+
+def _compile_globs(globs):
+    """Combine all globs into one case-insensitive regex, or None if there are none"""
+    patterns = [fnmatch.translate(glob.replace('\\', '/')) for glob in globs if glob]
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), re.IGNORECASE)
+
+
+class CompiledPolicy:
+    """A FilePolicy version compiled into set and regex lookups"""
+
+    def __init__(self, policy):
+        self.version = policy['id']
+        self.deep_scan_extensions = _normalize_extensions(policy['deep_scan_extensions'])
+        self.quarantine_extensions = _normalize_extensions(policy['quarantine_extensions'])
+        self.deep_scan_paths = _compile_globs(policy['deep_scan_path_globs'])
+        self.quarantine_paths = _compile_globs(policy['quarantine_path_globs'])
+        self.blocked_hashes = frozenset(h.lower() for h in policy['blocked_hashes'])
+        self.allowed_hashes = frozenset(h.lower() for h in policy['allowed_hashes'])
+        self.max_upload_size = policy['max_upload_size']
+        self.oversize_action = policy['oversize_action']
+        self.config = {
+            'enforce_acl': policy['enforce_acl'],
+            'dangerous_ext': sorted(self.deep_scan_extensions | self.quarantine_extensions),
+            'max_upload_size': self.max_upload_size,
+            'policy_version': self.version,
+        }
+        # Content hash, so in-place edits that change nothing agents see keep the ETag
+        digest = hashlib.sha256(json.dumps(self.config, sort_keys=True).encode()).hexdigest()
+        self.etag = f'"config-{digest[:32]}"'
+
+    def evaluate(self, files, verdicts=None):
+        """
+        Return ({relpath: action}, {action: count}, learned) for a USB file
+        inventory. Files that are simply allowed are left out of the mapping.
+
+        verdicts maps sha256 -> stored verdict for hashes already decided;
+        learned maps sha256 -> verdict for new decisions worth persisting.
+        """
+        file_actions = {}
+        counts = {'quarantine': 0, 'upload_for_deep_scan': 0}
+        learned = {}
+        verdicts = verdicts or {}
+
+        deep_scan_extensions = self.deep_scan_extensions
+        quarantine_extensions = self.quarantine_extensions
+        deep_scan_paths = self.deep_scan_paths
+        quarantine_paths = self.quarantine_paths
+        blocked_hashes = self.blocked_hashes
+        allowed_hashes = self.allowed_hashes
+        max_upload_size = self.max_upload_size
+
+        for file_info in files:
+            if not isinstance(file_info, dict):
+                continue
+
+            relpath = file_info.get('relpath')
+            if not relpath:
+                continue
+
+            sha256 = (file_info.get('sha256') or '').lower()
+            if sha256 and sha256 in allowed_hashes:
+                continue
+
+            verdict = verdicts.get(sha256) if sha256 else None
+            if verdict == 'clean' and sha256 not in blocked_hashes:
+                continue
+
+            ext = (file_info.get('ext') or '').lower()
+            if not ext:
+                _, dot, suffix = relpath.rpartition('.')
+                ext = f'.{suffix.lower()}' if dot and '/' not in suffix and '\\' not in suffix else ''
+
+            vt_result = file_info.get('vt_result')
+            path = relpath.replace('\\', '/')
+
+            if (sha256 and sha256 in blocked_hashes) or verdict == 'malicious':
+                action = 'quarantine'
+            elif isinstance(vt_result, dict) and vt_result.get('malicious', 0) > 0:
+                action = 'quarantine'
+                if is_sha256(sha256):
+                    learned[sha256] = 'malicious'
+            elif ext in quarantine_extensions or (quarantine_paths is not None and quarantine_paths.match(path)):
+                action = 'quarantine'
+            elif (
+                verdict == 'suspicious'
+                or ext in deep_scan_extensions
+                or (deep_scan_paths is not None and deep_scan_paths.match(path))
+            ):
+                size = file_info.get('size')
+                if isinstance(size, int) and size > max_upload_size:
+                    if self.oversize_action == 'allow':
+                        continue
+                    action = 'quarantine'
+                else:
+                    action = 'upload_for_deep_scan'
+            else:
+                continue
+
+            file_actions[relpath] = action
+            counts[action] += 1
+
+        return file_actions, counts, learned
+
+
+class PolicyEngine:
+    """
+    Serves the compiled active FilePolicy.
+
+    The compiled policy is shared by usb_event and agent-config. It is
+    rebuilt when a FilePolicy is saved in this process (see signals), or
+    at most AGENT_POLICY_REFRESH_INTERVAL seconds after another process
+    activates a new version.
+    """
+
+    def __init__(self):
+        self.refresh_interval = settings.AGENT_POLICY_REFRESH_INTERVAL
+        self._compiled = None
+        self._compiled_key = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        compiled = self._compiled
+        if compiled is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+            return compiled
+
+        with self._lock:
+            # updated_at catches in-place edits of the active version
+            key = (
+                FilePolicy.objects.filter(is_active=True)
+                .order_by('-id')
+                .values_list('id', 'updated_at')
+                .first()
+            )
+
+            if self._compiled is None or self._compiled_key != key:
+                self._compiled = self._compile(key[0] if key else None)
+                self._compiled_key = key
+                logger.info(f"Compiled file policy version={self._compiled.version}")
+
+            self._checked_at = time.monotonic()
+            return self._compiled
+
+    async def aget(self):
+        compiled = self._compiled
+        if compiled is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+            return compiled
+        return await sync_to_async(self.get)()
+
+    def invalidate(self):
+        self._checked_at = 0.0
+
+    def _compile(self, version):
+        if not version:
+            return CompiledPolicy(DEFAULT_POLICY)
+
+        policy = FilePolicy.objects.filter(id=version).values(*DEFAULT_POLICY.keys()).get()
+        return CompiledPolicy(policy)
+
+
+policy_engine = PolicyEngine()
@@ -0,0 +1,143 @@
+"""
+Signature matching for the deep-scan worker pool.
+
+This module must not import Django models: it is imported by the spawned
+worker processes, which only stream objects from storage and match bytes,
+and hand results back to the parent process that owns the database.
+"""
+
+import re
+from array import array
+from collections import deque
+
+from whitehat_app.storage import create_storage
+
+
+class SignatureMatcher:
+    """
+    Aho-Corasick automaton over byte signatures.
+
+    The automaton is compiled into a dense DFA (one 256-entry row per
+    state, failure links folded in), so each input byte costs one table
+    lookup. While in the root state, the scan jumps straight to the next
+    byte that can start a signature. Matches are found in a single pass
+    regardless of the number of signatures, and the state carries over
+    between chunks so signatures spanning chunk boundaries are found.
+    """
+
+    def __init__(self, patterns):
+        goto = [{}]
+        outputs = [()]
+
+        for index, pattern in enumerate(patterns):
+            state = 0
+            for byte in pattern:
+                next_state = goto[state].get(byte)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto.append({})
+                    outputs.append(())
+                    goto[state][byte] = next_state
+                state = next_state
+            outputs[state] += (index,)
+
+        state_count = len(goto)
+        delta = array('I', bytes(4 * 256 * state_count))
+        fail = [0] * state_count
+
+        for byte, next_state in goto[0].items():
+            delta[byte] = next_state
+
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] += outputs[fail[state]]
+
+            base = state << 8
+            fail_base = fail[state] << 8
+            delta[base:base + 256] = delta[fail_base:fail_base + 256]
+            for byte, next_state in goto[state].items():
+                fail[next_state] = delta[fail_base | byte]
+                delta[base | byte] = next_state
+                queue.append(next_state)
+
+        self.patterns = list(patterns)
+        self.delta = delta
+        self.outputs = outputs
+        first_bytes = sorted(goto[0])
+        self.first_bytes = re.compile(
+            b'[' + b''.join(re.escape(bytes([byte])) for byte in first_bytes) + b']'
+        ) if first_bytes else None
+
+    def scan(self, chunks, max_matches):
+        """Return ([(pattern_index, offset)], bytes_scanned) for an iterable of byte chunks"""
+        delta = self.delta
+        outputs = self.outputs
+        first_bytes = self.first_bytes
+        matches = []
+        state = 0
+        offset = 0
+
+        for chunk in chunks:
+            if first_bytes is None:
+                offset += len(chunk)
+                continue
+
+            position = 0
+            length = len(chunk)
+            while position < length:
+                if state == 0:
+                    found = first_bytes.search(chunk, position)
+                    if found is None:
+                        break
+                    position = found.start()
+
+                state = delta[(state << 8) | chunk[position]]
+                if outputs[state] and len(matches) < max_matches:
+                    for index in outputs[state]:
+                        matches.append((index, offset + position - len(self.patterns[index]) + 1))
+                position += 1
+
+            offset += length
+
+        return matches[:max_matches], offset
+
+
+_storage = None
+_matchers = {}
+
+
+def init_worker():
+    """Process pool initializer: each worker gets its own storage client and connection pool"""
+    global _storage
+    _storage = create_storage()
+
+
+def scan_object(bucket, object_name, signature_version, signatures, chunk_size, max_matches):
+    """
+    Stream one object and match it against `signatures`, a list of
+    (name, pattern bytes, verdict). Runs in a worker process.
+    """
+    matcher = _matchers.get(signature_version)
+    if matcher is None:
+        _matchers.clear()
+        matcher = _matchers[signature_version] = SignatureMatcher([pattern for _, pattern, _ in signatures])
+
+    storage = _storage or create_storage()
+    if not storage.is_available():
+        raise RuntimeError('storage_unavailable')
+
+    chunks = storage.iter_chunks(bucket, object_name, chunk_size)
+    try:
+        found, bytes_scanned = matcher.scan(chunks, max_matches)
+    finally:
+        chunks.close()
+
+    return {
+        'matches': [
+            {'signature': signatures[index][0], 'verdict': signatures[index][2], 'offset': match_offset}
+            for index, match_offset in found
+        ],
+        'bytes_scanned': bytes_scanned,
+        'signature_version': signature_version,
+    }
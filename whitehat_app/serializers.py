@@ -2,8 +2,9 @@ from rest_framework import serializers
 
 from whitehat_app.models import (
     User, Campaign, Event, Incident, RiskHistory, Log,
-    Agent, FileUpload, OfflineEvent
+    Agent, FileUpload, OfflineEvent, AgentCommand
 )
+from whitehat_app.storage import storage
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -138,15 +139,23 @@ class AgentSerializer(serializers.ModelSerializer):
 class FileUploadSerializer(serializers.ModelSerializer):
     agent_hostname = serializers.CharField(source='agent.hostname', read_only=True)
     agent_user_email = serializers.CharField(source='agent.user.email', read_only=True)
+    download_url = serializers.SerializerMethodField()
 
     class Meta:
         model = FileUpload
         fields = [
             'upload_id', 'agent', 'agent_hostname', 'agent_user_email',
             'file_path', 'file_size', 'file_hash', 'bucket', 'object_name',
-            'status', 'error_message', 'created_at', 'completed_at'
+            'deduplicated', 'status', 'error_message', 'created_at', 'completed_at',
+            'scan_status', 'scan_result', 'scanned_at', 'download_url'
         ]
-        read_only_fields = ['upload_id', 'created_at', 'completed_at']
+        read_only_fields = ['upload_id', 'created_at', 'completed_at', 'scan_status', 'scan_result', 'scanned_at']
+
+    def get_download_url(self, obj):
+        # Views pass storage_available, checked once for the whole response
+        if obj.status != 'completed' or not self.context.get('storage_available', True):
+            return None
+        return storage.get_download_url(obj.object_name)
 
 
 class OfflineEventSerializer(serializers.ModelSerializer):
@@ -160,3 +169,16 @@ class OfflineEventSerializer(serializers.ModelSerializer):
             'event_type', 'payload', 'timestamp', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+
+
+class AgentCommandSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AgentCommand
+        fields = [
+            'id', 'agent', 'command_type', 'payload', 'status', 'result',
+            'error_message', 'created_at', 'delivered_at', 'acknowledged_at'
+        ]
+        read_only_fields = [
+            'id', 'agent', 'status', 'result', 'error_message',
+            'created_at', 'delivered_at', 'acknowledged_at'
+        ]
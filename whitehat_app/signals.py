@@ -1,7 +1,15 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from whitehat_app.models import Log, Incident, User
+from whitehat_app.models import Log, Incident, User, Agent, AgentCommand, FilePolicy, HashVerdict, UsbWhitelistEntry
 from whitehat_app.ai_service import ai_service
+from whitehat_app.agent_cache import agent_cache
+from whitehat_app.fleet_stats import fleet_stats
+from whitehat_app.command_queue import command_queue
+from whitehat_app.hash_verdicts import verdict_index
+from whitehat_app.policy_engine import policy_engine
+from whitehat_app.heartbeat_writer import heartbeat_writer
+from whitehat_app.usb_whitelist import usb_whitelist
 import logging
 
 logger = logging.getLogger(__name__)
@@ -69,3 +77,68 @@ def analyze_log_on_create(sender, instance, created, **kwargs):
 
     except Exception as e:
         logger.error(f"Error analyzing log {instance.id}: {str(e)}")
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_users(sender, instance, update_fields=None, **kwargs):
+    """Drop cached lookups of this user so agent endpoints never reference a stale user"""
+    # Logins only touch last_login, which no agent lookup reads
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    heartbeat_writer.forget_user_id(instance.pk)
+    agent_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Agent)
+@receiver(post_delete, sender=Agent)
+def invalidate_agent_cache(sender, instance, **kwargs):
+    agent_cache.invalidate(instance.agent_id)
+    fleet_stats.agents_changed()
+
+
+@receiver(post_delete, sender=Agent)
+def forget_deleted_agent(sender, instance, **kwargs):
+    heartbeat_writer.forget_agent(instance.agent_id)
+
+
+@receiver(post_save, sender=Agent)
+def resolve_new_agent_whitelist(sender, instance, created, **kwargs):
+    if created:
+        usb_whitelist.sync_agent(instance.agent_id)
+
+
+@receiver(post_save, sender=AgentCommand)
+def wake_command_pollers(sender, instance, created, **kwargs):
+    """Release long-polling `commands` requests held in this process for the agent"""
+    if created:
+        transaction.on_commit(lambda: command_queue.notify(instance.agent_id))
+
+
+@receiver(post_save, sender=FilePolicy)
+@receiver(post_delete, sender=FilePolicy)
+def recompile_file_policy(sender, instance, **kwargs):
+    policy_engine.invalidate()
+
+
+@receiver(post_save, sender=HashVerdict)
+def refresh_hash_verdicts(sender, instance, **kwargs):
+    verdict_index.invalidate()
+
+
+@receiver(post_delete, sender=HashVerdict)
+def rebuild_hash_verdicts(sender, instance, **kwargs):
+    # Deletions are not visible to the incremental pull
+    verdict_index.invalidate(rebuild=True)
+
+
+@receiver(post_save, sender=UsbWhitelistEntry)
+def resolve_whitelist_entry(sender, instance, **kwargs):
+    # Runs inside the entry's save transaction, with the version it was saved under
+    usb_whitelist.entry_changed(instance, instance.version)
+
+
+@receiver(post_delete, sender=UsbWhitelistEntry)
+def resolve_deleted_whitelist_entry(sender, instance, **kwargs):
+    # After commit: the delete may be a cascade from the entry's agent or user
+    transaction.on_commit(lambda: usb_whitelist.entry_removed(instance))
@@ -0,0 +1,27 @@
+"""
+Object storage for agent uploads.
+
+OBJECT_STORAGE_BACKEND selects the implementation: 'minio' (default) or
+'local', which keeps objects under OBJECT_STORAGE_ROOT (optionally served
+by a front proxy through OBJECT_STORAGE_ACCEL_REDIRECT). Like the MinIO
+credentials, these are read from the environment rather than Django
+settings, because the deep-scan worker processes do not load Django.
+"""
+
+import os
+
+from whitehat_app.storage.base import ObjectInfo, ObjectNotFound, StorageBackend
+from whitehat_app.storage.local_backend import LocalStorage
+from whitehat_app.storage.minio_backend import MinioStorage
+
+
+def create_storage():
+    backend = os.getenv('OBJECT_STORAGE_BACKEND', 'minio').lower()
+    if backend == 'local':
+        return LocalStorage()
+    if backend == 'minio':
+        return MinioStorage()
+    raise ValueError(f"Unknown OBJECT_STORAGE_BACKEND: {backend}")
+
+
+storage = create_storage()
@@ -0,0 +1,109 @@
+import logging
+import os
+from collections import namedtuple
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+ObjectInfo = namedtuple('ObjectInfo', ['object_name', 'size', 'etag', 'last_modified'])
+
+# put() reads the body in parts of this size unless told otherwise; MinIO
+# needs at least 5MB when the length is not known up front
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+class ObjectNotFound(Exception):
+    pass
+
+
+class StorageBackend:
+    """
+    Object storage for agent uploads.
+
+    Objects are addressed by (bucket, object_name). Reads are eager about
+    errors: stat() and iter_chunks() raise ObjectNotFound before any bytes
+    are returned, so callers can still answer 404. Agents reach storage
+    through the Django proxy (/api/minio/<bucket>/<object_name>) unless a
+    backend hands out presigned URLs.
+    """
+
+    bucket = 'file-uploads'
+    presigned = False
+
+    def __init__(self):
+        self.django_url = os.getenv('DJANGO_URL', 'http://localhost:8000')
+
+    def is_available(self):
+        raise NotImplementedError
+
+    def put(self, bucket, object_name, reader, length=-1, content_type='application/octet-stream', part_size=DEFAULT_PART_SIZE):
+        """Store everything `reader` returns until EOF under object_name"""
+        raise NotImplementedError
+
+    def stat(self, bucket, object_name):
+        """Return the ObjectInfo of an object, or raise ObjectNotFound"""
+        raise NotImplementedError
+
+    def iter_chunks(self, bucket, object_name, chunk_size, offset=0, length=None):
+        """Return a generator over the object's bytes from offset, length bytes or to the end; closing it releases the file or connection"""
+        raise NotImplementedError
+
+    def copy(self, bucket, source_name, object_name):
+        raise NotImplementedError
+
+    def remove(self, bucket, object_name):
+        """Remove an object; removing a missing object is not an error"""
+        raise NotImplementedError
+
+    def remove_many(self, bucket, object_names):
+        """Remove objects and return [(object_name, error message)] for those that failed"""
+        errors = []
+        for object_name in object_names:
+            try:
+                self.remove(bucket, object_name)
+            except Exception as e:
+                errors.append((object_name, str(e)))
+        return errors
+
+    def list(self, bucket, prefix):
+        """Iterate the ObjectInfo of every object whose name starts with prefix"""
+        raise NotImplementedError
+
+    def accel_redirect(self, bucket, object_name):
+        """Internal URI a front proxy serves the object from (X-Accel-Redirect), else None"""
+        return None
+
+    def proxy_url(self, object_name):
+        return f"{self.django_url}/api/minio/{self.bucket}/{object_name}"
+
+    def get_upload_url(self, object_name, expires=timedelta(hours=1)):
+        if not self.is_available():
+            return None
+        return self.proxy_url(object_name)
+
+    def get_download_url(self, object_name, expires=timedelta(hours=1)):
+        if not self.is_available():
+            return None
+        return self.proxy_url(object_name)
+
+    def get_upload_form(self, object_name, file_size, content_type='application/octet-stream', expires=timedelta(hours=1)):
+        return None
+
+    def remove_object(self, object_name):
+        if not self.is_available():
+            return
+
+        try:
+            self.remove(self.bucket, object_name)
+        except Exception as e:
+            logger.error(f"Error removing object: object_name={object_name}, error={str(e)}")
+
+    def file_exists(self, object_name):
+        if not self.is_available():
+            return False
+
+        try:
+            self.stat(self.bucket, object_name)
+            return True
+        except Exception:
+            return False
@@ -0,0 +1,156 @@
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from whitehat_app.storage.base import DEFAULT_PART_SIZE, ObjectInfo, ObjectNotFound, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+TEMP_PREFIX = '.incoming-'
+
+
+class LocalStorage(StorageBackend):
+    """
+    Objects as plain files under OBJECT_STORAGE_ROOT/<bucket>/<object_name>,
+    for single-node deployments and benchmarks that should not need an S3
+    service.
+
+    Writes go to a temporary file in the target directory and are renamed
+    into place, so readers never see a partial object. Copies are hard
+    links where the filesystem allows it.
+
+    The app runs under ASGI, which has no sendfile, so downloads are read
+    through Python in chunks. When a front proxy (e.g. nginx) maps
+    OBJECT_STORAGE_ACCEL_REDIRECT to OBJECT_STORAGE_ROOT as an internal
+    location, accel_redirect() lets the MinIO proxy hand whole-object
+    downloads to it with X-Accel-Redirect instead.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.root = os.path.abspath(os.getenv('OBJECT_STORAGE_ROOT', 'object-storage'))
+        self.accel_redirect_prefix = os.getenv('OBJECT_STORAGE_ACCEL_REDIRECT', '').rstrip('/')
+
+    def is_available(self):
+        try:
+            os.makedirs(os.path.join(self.root, self.bucket), exist_ok=True)
+        except OSError as e:
+            logger.error(f"Failed to initialize local object storage: root={self.root}, error={str(e)}")
+            return False
+        return True
+
+    def _path(self, bucket, object_name):
+        if not bucket or bucket.startswith('.') or '/' in bucket or os.sep in bucket:
+            raise ObjectNotFound(object_name)
+        bucket_root = os.path.join(self.root, bucket)
+        path = os.path.normpath(os.path.join(bucket_root, object_name))
+        # Object names come from request paths; never resolve outside the bucket
+        if path == bucket_root or os.path.commonpath([bucket_root, path]) != bucket_root:
+            raise ObjectNotFound(object_name)
+        return path
+
+    def _temp_path(self, path):
+        directory, name = os.path.split(path)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{TEMP_PREFIX}{uuid.uuid4().hex}-{name}")
+
+    def put(self, bucket, object_name, reader, length=-1, content_type='application/octet-stream', part_size=DEFAULT_PART_SIZE):
+        path = self._path(bucket, object_name)
+        temp_path = self._temp_path(path)
+        try:
+            with open(temp_path, 'wb') as f:
+                shutil.copyfileobj(reader, f, part_size)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def stat(self, bucket, object_name):
+        try:
+            st = os.stat(self._path(bucket, object_name))
+        except (FileNotFoundError, NotADirectoryError):
+            raise ObjectNotFound(object_name)
+        return self._info(object_name, st)
+
+    @staticmethod
+    def _info(object_name, st):
+        return ObjectInfo(
+            object_name,
+            st.st_size,
+            f"{st.st_mtime_ns:x}-{st.st_size:x}",
+            datetime.fromtimestamp(st.st_mtime, timezone.utc),
+        )
+
+    def iter_chunks(self, bucket, object_name, chunk_size, offset=0, length=None):
+        try:
+            f = open(self._path(bucket, object_name), 'rb')
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+            raise ObjectNotFound(object_name)
+        return self._stream(f, chunk_size, offset, length)
+
+    @staticmethod
+    def _stream(f, chunk_size, offset, length):
+        try:
+            f.seek(offset)
+            remaining = length
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            f.close()
+
+    def copy(self, bucket, source_name, object_name):
+        source = self._path(bucket, source_name)
+        path = self._path(bucket, object_name)
+        temp_path = self._temp_path(path)
+        try:
+            os.link(source, temp_path)
+        except FileNotFoundError:
+            raise ObjectNotFound(source_name)
+        except OSError:
+            shutil.copyfile(source, temp_path)
+        os.replace(temp_path, path)
+
+    def remove(self, bucket, object_name):
+        try:
+            os.remove(self._path(bucket, object_name))
+        except (FileNotFoundError, ObjectNotFound):
+            pass
+
+    def list(self, bucket, prefix):
+        bucket_root = os.path.join(self.root, bucket)
+        # Only walk the directory the prefix points into
+        start = os.path.join(bucket_root, os.path.dirname(prefix))
+        for directory, _, filenames in os.walk(start):
+            for filename in filenames:
+                if filename.startswith(TEMP_PREFIX):
+                    continue
+                path = os.path.join(directory, filename)
+                object_name = os.path.relpath(path, bucket_root).replace(os.sep, '/')
+                if not object_name.startswith(prefix):
+                    continue
+                try:
+                    yield self._info(object_name, os.stat(path))
+                except FileNotFoundError:
+                    continue
+
+    def accel_redirect(self, bucket, object_name):
+        if not self.accel_redirect_prefix:
+            return None
+        try:
+            path = self._path(bucket, object_name)
+        except ObjectNotFound:
+            return None
+        if not os.path.isfile(path):
+            return None
+        return f"{self.accel_redirect_prefix}/{quote(bucket)}/{quote(object_name)}"
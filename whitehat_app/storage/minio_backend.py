@@ -0,0 +1,178 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from minio import Minio
+from minio.commonconfig import CopySource
+from minio.datatypes import PostPolicy
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
+
+from whitehat_app.storage.base import DEFAULT_PART_SIZE, ObjectInfo, ObjectNotFound, StorageBackend
+
+MISSING_OBJECT_CODES = ('NoSuchKey', 'NoSuchObject', 'NoSuchBucket')
+
+
+class MinioStorage(StorageBackend):
+
+    def __init__(self):
+        super().__init__()
+        self.endpoint = os.getenv('MINIO_ENDPOINT', 'localhost:9000')
+        self.access_key = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
+        self.secret_key = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
+        self.secure = os.getenv('MINIO_SECURE', 'False').lower() == 'true'
+        # 'proxy' hands out URLs of the Django minio_proxy; 'presigned' hands
+        # out URLs signed for MinIO itself, so file bytes bypass Django
+        self.url_mode = os.getenv('MINIO_URL_MODE', 'proxy').lower()
+        # Host agents and analysts use to reach MinIO, if it differs from MINIO_ENDPOINT
+        self.public_endpoint = os.getenv('MINIO_PUBLIC_ENDPOINT', self.endpoint)
+        self.region = os.getenv('MINIO_REGION', 'us-east-1')
+        self.bucket = 'file-uploads'
+        self.client = None
+        self.presign_client = None
+        self._initialized = False
+
+    @property
+    def presigned(self):
+        return self.url_mode == 'presigned'
+
+    def _ensure_client(self):
+        if self._initialized:
+            return
+
+        try:
+            self.client = Minio(
+                self.endpoint,
+                access_key=self.access_key,
+                secret_key=self.secret_key,
+                secure=self.secure
+            )
+            # Signing is offline; a fixed region avoids a region lookup per URL
+            self.presign_client = Minio(
+                self.public_endpoint,
+                access_key=self.access_key,
+                secret_key=self.secret_key,
+                secure=self.secure,
+                region=self.region
+            )
+            self._ensure_bucket_exists()
+            self._initialized = True
+        except Exception as e:
+            print(f"[MINIO] Failed to initialize: {str(e)}")
+
+    def _ensure_bucket_exists(self):
+        try:
+            if not self.client.bucket_exists(self.bucket):
+                self.client.make_bucket(self.bucket)
+        except S3Error as e:
+            print(f"[MINIO] Error creating bucket: {str(e)}")
+
+    def is_available(self):
+        # A client whose first bucket check failed is not usable yet
+        self._ensure_client()
+        return self._initialized
+
+    def put(self, bucket, object_name, reader, length=-1, content_type='application/octet-stream', part_size=DEFAULT_PART_SIZE):
+        # One part in flight at a time keeps memory at part_size per upload
+        self.client.put_object(
+            bucket,
+            object_name,
+            reader,
+            length=length,
+            content_type=content_type,
+            part_size=part_size,
+            num_parallel_uploads=1
+        )
+
+    def stat(self, bucket, object_name):
+        try:
+            stat = self.client.stat_object(bucket, object_name)
+        except S3Error as e:
+            if e.code in MISSING_OBJECT_CODES:
+                raise ObjectNotFound(object_name) from e
+            raise
+        return ObjectInfo(object_name, stat.size, stat.etag, stat.last_modified)
+
+    def iter_chunks(self, bucket, object_name, chunk_size, offset=0, length=None):
+        try:
+            response = self.client.get_object(bucket, object_name, offset=offset, length=length or 0)
+        except S3Error as e:
+            if e.code in MISSING_OBJECT_CODES:
+                raise ObjectNotFound(object_name) from e
+            raise
+        return self._stream(response, chunk_size)
+
+    @staticmethod
+    def _stream(response, chunk_size):
+        try:
+            yield from response.stream(chunk_size)
+        finally:
+            response.close()
+            response.release_conn()
+
+    def copy(self, bucket, source_name, object_name):
+        self.client.copy_object(bucket, object_name, CopySource(bucket, source_name))
+
+    def remove(self, bucket, object_name):
+        self.client.remove_object(bucket, object_name)
+
+    def remove_many(self, bucket, object_names):
+        errors = self.client.remove_objects(bucket, [DeleteObject(name) for name in object_names])
+        # remove_objects is lazy; iterating sends the delete requests
+        return [(error.name, error.message) for error in errors]
+
+    def list(self, bucket, prefix):
+        for obj in self.client.list_objects(bucket, prefix=prefix, recursive=True):
+            yield ObjectInfo(obj.object_name, obj.size, obj.etag, obj.last_modified)
+
+    def get_upload_url(self, object_name, expires=timedelta(hours=1)):
+        self._ensure_client()
+        if not self.client:
+            return None
+
+        try:
+            if self.presigned:
+                return self.presign_client.presigned_put_object(self.bucket, object_name, expires=expires)
+
+            return self.proxy_url(object_name)
+        except Exception as e:
+            print(f"[MINIO] Error generating upload URL: {str(e)}")
+            return None
+
+    def get_upload_form(self, object_name, file_size, content_type='application/octet-stream', expires=timedelta(hours=1)):
+        """
+        Presigned POST form for object_name that MinIO only accepts with
+        exactly file_size bytes of content_type. Query-signed PUT URLs
+        cannot bind these, so agents that can send a multipart form should
+        prefer this. Returns {'url', 'fields'} or None outside presigned mode.
+        """
+        self._ensure_client()
+        if not self.client or not self.presigned:
+            return None
+
+        try:
+            policy = PostPolicy(self.bucket, datetime.now(timezone.utc) + expires)
+            policy.add_equals_condition('key', object_name)
+            policy.add_equals_condition('Content-Type', content_type)
+            policy.add_content_length_range_condition(file_size, file_size)
+            fields = self.presign_client.presigned_post_policy(policy)
+            fields['key'] = object_name
+            fields['Content-Type'] = content_type
+            scheme = 'https' if self.secure else 'http'
+            return {'url': f"{scheme}://{self.public_endpoint}/{self.bucket}", 'fields': fields}
+        except Exception as e:
+            print(f"[MINIO] Error generating upload form: {str(e)}")
+            return None
+
+    def get_download_url(self, object_name, expires=timedelta(hours=1)):
+        self._ensure_client()
+        if not self.client:
+            return None
+
+        try:
+            if self.presigned:
+                return self.presign_client.presigned_get_object(self.bucket, object_name, expires=expires)
+
+            return self.proxy_url(object_name)
+        except Exception as e:
+            print(f"[MINIO] Error generating download URL: {str(e)}")
+            return None
@@ -0,0 +1,116 @@
+import math
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from whitehat_app.models import FileUpload
+
+
+class UploadAdmission:
+    """
+    Decides whether an upload request may start a transfer now.
+
+    Limits are fleet-wide and per agent: the number of active transfers
+    (pending uploads younger than AGENT_UPLOAD_ACTIVE_TTL) and the bytes
+    admitted in the last AGENT_UPLOAD_ADMISSION_WINDOW seconds against a
+    bytes-per-second rate. A limit of 0 is disabled. The counts come from
+    FileUpload itself, so every web process sees the same load; two
+    processes admitting at the same instant can overshoot by a request.
+
+    Requests that are not admitted get no upload row, only a retry_after
+    hint with jitter, so a burst of deferred agents does not come back in
+    lockstep. Deduplicated uploads transfer nothing and are always admitted.
+    """
+
+    def __init__(self):
+        self.max_active = settings.AGENT_UPLOAD_MAX_ACTIVE
+        self.max_active_per_agent = settings.AGENT_UPLOAD_MAX_ACTIVE_PER_AGENT
+        self.max_bytes_per_second = settings.AGENT_UPLOAD_MAX_BYTES_PER_SECOND
+        self.max_bytes_per_second_per_agent = settings.AGENT_UPLOAD_MAX_BYTES_PER_SECOND_PER_AGENT
+        self.window = settings.AGENT_UPLOAD_ADMISSION_WINDOW
+        self.active_ttl = settings.AGENT_UPLOAD_ACTIVE_TTL
+        self.retry_after = settings.AGENT_UPLOAD_RETRY_AFTER
+
+    @property
+    def enabled(self):
+        return any([
+            self.max_active,
+            self.max_active_per_agent,
+            self.max_bytes_per_second,
+            self.max_bytes_per_second_per_agent,
+        ])
+
+    def admit(self, agent_pk, sizes):
+        """
+        Return one entry per size, in order: None if the transfer is
+        admitted, else the number of seconds to wait before asking again.
+        """
+        if not self.enabled or not sizes:
+            return [None] * len(sizes)
+
+        load = self._load(agent_pk)
+        active = load['active']
+        agent_active = load['agent_active']
+        window_bytes = load['window_bytes'] or 0
+        agent_window_bytes = load['agent_window_bytes'] or 0
+
+        decisions = []
+        for size in sizes:
+            waits = []
+            if self.max_active and active >= self.max_active:
+                waits.append(self.retry_after)
+            if self.max_active_per_agent and agent_active >= self.max_active_per_agent:
+                waits.append(self.retry_after)
+            waits.append(self._rate_wait(window_bytes, size, self.max_bytes_per_second))
+            waits.append(self._rate_wait(agent_window_bytes, size, self.max_bytes_per_second_per_agent))
+
+            wait = max(waits)
+            if wait:
+                decisions.append(math.ceil(wait * random.uniform(1.0, 1.5)))
+                continue
+
+            active += 1
+            agent_active += 1
+            window_bytes += size
+            agent_window_bytes += size
+            decisions.append(None)
+
+        return decisions
+
+    def _rate_wait(self, window_bytes, size, bytes_per_second):
+        """
+        Seconds until enough of the window has aged out to admit size more
+        bytes under the rate. A file larger than the whole window's budget
+        is admitted once the window is empty.
+        """
+        if not bytes_per_second or not window_bytes:
+            return 0
+        excess = window_bytes + size - bytes_per_second * self.window
+        if excess <= 0:
+            return 0
+        return min(max(excess / bytes_per_second, 1), self.window)
+
+    def _load(self, agent_pk):
+        now = timezone.now()
+        active_since = now - timedelta(seconds=self.active_ttl)
+        window_since = now - timedelta(seconds=self.window)
+
+        is_active = Q(status='pending', created_at__gte=active_since)
+        in_window = Q(created_at__gte=window_since)
+        is_agent = Q(agent_id=agent_pk)
+
+        return FileUpload.objects.filter(
+            deduplicated=False,
+            created_at__gte=min(active_since, window_since),
+        ).aggregate(
+            active=Count('upload_id', filter=is_active),
+            agent_active=Count('upload_id', filter=is_active & is_agent),
+            window_bytes=Sum('file_size', filter=in_window),
+            agent_window_bytes=Sum('file_size', filter=in_window & is_agent),
+        )
+
+
+upload_admission = UploadAdmission()
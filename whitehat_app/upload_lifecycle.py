@@ -0,0 +1,224 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Q, Sum
+from django.utils import timezone
+
+from whitehat_app.fleet_stats import fleet_stats
+from whitehat_app.content_store import STAGING_PREFIX, content_hash_for, staging_object_name
+from whitehat_app.storage import storage
+from whitehat_app.models import FileUpload
+
+logger = logging.getLogger(__name__)
+
+
+class UploadReaper:
+    """
+    Expires uploads that stayed pending past AGENT_UPLOAD_PENDING_TTL and
+    removes the partial objects they left in the bucket.
+
+    A daemon thread in each web process runs a pass every
+    AGENT_UPLOAD_REAP_INTERVAL seconds once the process has handled an
+    upload request; `manage.py reap_uploads` runs one on demand. Stale rows
+    are claimed in chunks with SKIP LOCKED, so concurrent reapers split the
+    work instead of colliding.
+    """
+
+    def __init__(self):
+        self.pending_ttl = settings.AGENT_UPLOAD_PENDING_TTL
+        self.interval = settings.AGENT_UPLOAD_REAP_INTERVAL
+        self.batch_size = settings.AGENT_UPLOAD_REAP_BATCH_SIZE
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def reap(self):
+        """Run one pass. Returns (expired uploads, object deletions issued)"""
+        cutoff = timezone.now() - timedelta(seconds=self.pending_ttl)
+        expired = 0
+        removed = 0
+
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    FileUpload.objects.select_for_update(skip_locked=True)
+                    .filter(status='pending', created_at__lt=cutoff)
+                    .order_by('created_at')
+                    .values_list('upload_id', 'object_name')[:self.batch_size]
+                )
+                if not batch:
+                    break
+
+                updated = FileUpload.objects.filter(upload_id__in=[upload_id for upload_id, _ in batch], status='pending').update(
+                    status='expired',
+                    error_message='upload_expired',
+                    finished_at=timezone.now(),
+                )
+                fleet_stats.uploads_changed({('pending', 'expired'): updated})
+
+            expired += len(batch)
+            removed += self._remove_orphans(batch)
+
+        removed += self._remove_stale_staging(cutoff)
+
+        if expired or removed:
+            logger.info(f"Upload reaper pass: expired={expired}, object_deletions={removed}")
+        return expired, removed
+
+    def ensure_running(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='upload-reaper', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+
+            close_old_connections()
+            try:
+                self.reap()
+            except Exception as e:
+                logger.error(f"Upload reaper error: {str(e)}", exc_info=True)
+            finally:
+                close_old_connections()
+
+    def _remove_orphans(self, batch):
+        plain_names = set()
+        orphans = set()
+
+        for upload_id, object_name in batch:
+            if content_hash_for(object_name):
+                # Content-addressed bytes only reach their final name once
+                # verified; a direct upload may have left a staged copy
+                if storage.presigned:
+                    orphans.add(staging_object_name(upload_id))
+            else:
+                plain_names.add(object_name)
+
+        # Per-agent object names are reused when the same file is uploaded again
+        in_use = set(
+            FileUpload.objects.filter(object_name__in=plain_names)
+            .exclude(status='expired')
+            .values_list('object_name', flat=True)
+        )
+        orphans |= plain_names - in_use
+
+        return self._remove(orphans)
+
+    def _remove_stale_staging(self, cutoff):
+        """Staged objects older than the pending TTL belong to no live upload"""
+        if not storage.is_available():
+            return 0
+
+        try:
+            stale = [
+                obj.object_name
+                for obj in storage.list(storage.bucket, prefix=f"{STAGING_PREFIX}/")
+                if obj.last_modified is not None and obj.last_modified < cutoff
+            ]
+        except Exception as e:
+            logger.error(f"Failed to list staged uploads: {str(e)}")
+            return 0
+
+        return self._remove(stale)
+
+    def _remove(self, object_names):
+        if not object_names:
+            return 0
+
+        if not storage.is_available():
+            return 0
+
+        try:
+            for object_name, error in storage.remove_many(storage.bucket, object_names):
+                logger.error(f"Failed to remove orphaned object: object_name={object_name}, error={error}")
+        except Exception as e:
+            logger.error(f"Failed to remove orphaned objects: {str(e)}")
+            return 0
+
+        return len(object_names)
+
+
+def _percentile(durations, count, fraction):
+    """The duration at `fraction` of count rows, read as one row of a database-side sort"""
+    if not count:
+        return None
+    index = min(int(fraction * count), count - 1)
+    return round(durations.order_by('duration').values_list('duration', flat=True)[index].total_seconds(), 3)
+
+
+def upload_metrics(window_seconds):
+    """
+    Throughput and latency of uploads that reached a final state in the
+    last window_seconds, plus the current pending backlog.
+
+    Latency is the time from request_upload to the final state, reported
+    per final state. Deduplicated uploads finish at request time and are
+    only counted, not timed. Everything is aggregated in the database;
+    each percentile reads a single row.
+    """
+    now = timezone.now()
+    finished = FileUpload.objects.filter(finished_at__gte=now - timedelta(seconds=window_seconds))
+
+    counts = {'completed': 0, 'failed': 0, 'expired': 0}
+    deduplicated = 0
+    bytes_uploaded = 0
+    for row in finished.values('status').annotate(
+        count=Count('upload_id'),
+        deduplicated_count=Count('upload_id', filter=Q(deduplicated=True)),
+        bytes=Sum('file_size', filter=Q(deduplicated=False)),
+    ).order_by():
+        counts[row['status']] = row['count']
+        deduplicated += row['deduplicated_count']
+        if row['status'] == 'completed':
+            bytes_uploaded = row['bytes'] or 0
+
+    timed = finished.filter(deduplicated=False).annotate(
+        duration=ExpressionWrapper(F('finished_at') - F('created_at'), output_field=DurationField())
+    )
+    summaries = {
+        row['status']: row
+        for row in timed.values('status').annotate(count=Count('upload_id'), avg=Avg('duration'), max=Max('duration')).order_by()
+    }
+
+    latency = {}
+    for upload_status in ['completed', 'failed', 'expired'] + sorted(set(summaries) - {'completed', 'failed', 'expired'}):
+        summary = summaries.get(upload_status, {'count': 0, 'avg': None, 'max': None})
+        durations = timed.filter(status=upload_status)
+        latency[upload_status] = {
+            'count': summary['count'],
+            'avg': round(summary['avg'].total_seconds(), 3) if summary['avg'] is not None else None,
+            'p50': _percentile(durations, summary['count'], 0.5),
+            'p95': _percentile(durations, summary['count'], 0.95),
+            'max': round(summary['max'].total_seconds(), 3) if summary['max'] is not None else None,
+        }
+
+    oldest_pending = (
+        FileUpload.objects.filter(status='pending')
+        .order_by('created_at')
+        .values_list('created_at', flat=True)
+        .first()
+    )
+
+    return {
+        'window_seconds': window_seconds,
+        'finished': counts,
+        'deduplicated': deduplicated,
+        'completed_per_minute': round(counts['completed'] / (window_seconds / 60), 3),
+        'bytes_uploaded': bytes_uploaded,
+        'bytes_per_second': round(bytes_uploaded / window_seconds, 3),
+        'latency_seconds': latency,
+        'pending': FileUpload.objects.filter(status='pending').count(),
+        'oldest_pending_age_seconds': round((now - oldest_pending).total_seconds(), 3) if oldest_pending else None,
+    }
+
+
+upload_reaper = UploadReaper()
@@ -0,0 +1,212 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Max, Q
+
+from whitehat_app.models import Agent, AgentWhitelistDevice, SyncCounter, UsbWhitelistEntry
+
+logger = logging.getLogger(__name__)
+
+WHITELIST_COUNTER = 'usb_whitelist'
+DEVICE_KEY_FIELDS = ('vendor_id', 'product_id', 'serial_number')
+DEVICE_FIELDS = DEVICE_KEY_FIELDS + ('description',)
+
+# Agents re-resolved per query when an entry changes
+RESOLVE_CHUNK_SIZE = 1000
+
+# Most specific scope wins when several active entries name the same device
+SCOPE_PRECEDENCE = {'global': 0, 'user': 1, 'agent': 2}
+
+
+def _device_key(row):
+    return row['vendor_id'], row['product_id'], row['serial_number']
+
+
+class UsbWhitelist:
+    """
+    Per-agent USB whitelist documents served to agents.
+
+    Each agent's effective whitelist is materialized in AgentWhitelistDevice,
+    so serving it is an indexed read of that agent's rows rather than a
+    merge of the global, user and agent scopes on every poll. A saved entry
+    re-resolves only its own device, and only for the agents in its scope.
+
+    An agent's version is the newest version among its rows. Versions come
+    from the 'usb_whitelist' SyncCounter, whose row lock serializes
+    whitelist writes, so an unchanged whitelist costs agents one index
+    lookup and a 304. Agents that send since_version get only the devices
+    changed after it: active ones as added, removed ones as removed.
+    """
+
+    def version(self, agent_id):
+        return (
+            AgentWhitelistDevice.objects.filter(agent_id=agent_id)
+            .aggregate(version=Max('version'))['version']
+            or 0
+        )
+
+    def etag(self, version):
+        return f'"whitelist-{version}"'
+
+    def document(self, agent_id, version, since_version=None):
+        """
+        Whitelist of the agent at `version`, or the changes after
+        since_version. Devices changed after `version` was read may be
+        included too; agents apply them again on their next sync, which is
+        harmless.
+        """
+        rows = AgentWhitelistDevice.objects.filter(agent_id=agent_id)
+
+        # A since_version from the future (e.g. a restored database) cannot be diffed against
+        if since_version is None or since_version > version:
+            devices = list(rows.filter(is_active=True).order_by(*DEVICE_KEY_FIELDS).values(*DEVICE_FIELDS))
+            return {'version': version, 'devices': devices}
+
+        added = []
+        removed = []
+        for device in rows.filter(version__gt=since_version).order_by('version').values('is_active', *DEVICE_FIELDS):
+            (added if device.pop('is_active') else removed).append(device)
+
+        return {'version': version, 'since_version': since_version, 'added': added, 'removed': removed}
+
+    def entry_changed(self, entry, version):
+        """Re-resolve the entry's device for every agent in its scope"""
+        key = {field: getattr(entry, field) for field in DEVICE_KEY_FIELDS}
+
+        agents = Agent.objects.all()
+        if entry.scope == 'user':
+            agents = agents.filter(user_id=entry.user_id)
+        elif entry.scope == 'agent':
+            agents = agents.filter(agent_id=entry.agent_id)
+
+        # Every active entry for this device, whatever its scope; usually a handful
+        entries = list(
+            UsbWhitelistEntry.objects.filter(is_active=True, **key)
+            .values('scope', 'user_id', 'agent_id', 'description')
+        )
+        global_entries = [e['description'] for e in entries if e['scope'] == 'global']
+        user_entries = {e['user_id']: e['description'] for e in entries if e['scope'] == 'user'}
+        agent_entries = {e['agent_id']: e['description'] for e in entries if e['scope'] == 'agent'}
+
+        changed = 0
+        last_agent_id = None
+        while True:
+            chunk_agents = agents if last_agent_id is None else agents.filter(agent_id__gt=last_agent_id)
+            chunk = list(chunk_agents.order_by('agent_id').values_list('agent_id', 'user_id')[:RESOLVE_CHUNK_SIZE])
+            if not chunk:
+                break
+            last_agent_id = chunk[-1][0]
+
+            desired = {}
+            for agent_id, user_id in chunk:
+                if agent_id in agent_entries:
+                    description = agent_entries[agent_id]
+                elif user_id in user_entries:
+                    description = user_entries[user_id]
+                elif global_entries:
+                    description = global_entries[0]
+                else:
+                    continue
+                desired[(agent_id, _device_key(key))] = description
+
+            current = AgentWhitelistDevice.objects.filter(
+                agent_id__in=[agent_id for agent_id, _ in chunk], **key
+            )
+            changed += self._apply(current, desired, version)
+
+        logger.info(f"Whitelist entry resolved: scope={entry.scope}, device={entry.vendor_id}:{entry.product_id}, version={version}, agents_changed={changed}")
+
+    def entry_removed(self, entry):
+        """Re-resolve a deleted entry's device; deletes are not versioned by save()"""
+        with transaction.atomic():
+            self.entry_changed(entry, SyncCounter.next(WHITELIST_COUNTER))
+
+    def sync_agent(self, agent_id):
+        """
+        Resolve an agent's whole whitelist, e.g. when it is registered or
+        moves to another user. Returns the number of devices that changed.
+        """
+        # Usually nothing changes; only take the whitelist lock when something will be written
+        if not self._apply(*self._resolve_agent(agent_id), version=None):
+            return 0
+
+        with transaction.atomic():
+            version = SyncCounter.next(WHITELIST_COUNTER)
+            # Resolve again under the lock: an entry may have been saved in between
+            changed = self._apply(*self._resolve_agent(agent_id), version=version)
+
+        logger.info(f"Whitelist resynced: agent_id={agent_id}, version={version}, devices_changed={changed}")
+        return changed
+
+    def _resolve_agent(self, agent_id):
+        """(current rows, desired devices) of an agent's whole whitelist"""
+        current = AgentWhitelistDevice.objects.filter(agent_id=agent_id)
+        user_id = Agent.objects.filter(agent_id=agent_id).values_list('user_id', flat=True).first()
+        if user_id is None:
+            return current, {}
+
+        entries = (
+            UsbWhitelistEntry.objects.filter(is_active=True)
+            .filter(Q(scope='global') | Q(scope='user', user_id=user_id) | Q(scope='agent', agent_id=agent_id))
+            .values('scope', 'description', *DEVICE_KEY_FIELDS)
+        )
+        resolved = {}
+        for entry in entries:
+            key = (agent_id, _device_key(entry))
+            precedence = SCOPE_PRECEDENCE[entry['scope']]
+            if key not in resolved or precedence > resolved[key][0]:
+                resolved[key] = (precedence, entry['description'])
+        return current, {key: description for key, (_, description) in resolved.items()}
+
+    def sync_all(self):
+        """Resolve every agent's whitelist from scratch; returns the number of agents that changed"""
+        changed = 0
+        for agent_id in Agent.objects.order_by('agent_id').values_list('agent_id', flat=True).iterator():
+            if self.sync_agent(agent_id):
+                changed += 1
+        return changed
+
+    def _apply(self, current, desired, version):
+        """
+        Make the `current` rows match desired {(agent_id, device key):
+        description}, stamping changed rows with `version`; rows missing
+        from desired are marked removed. Returns the number of rows that
+        change. With version None nothing is written.
+        """
+        updates = []
+        for row in current:
+            description = desired.pop((row.agent_id, _device_key(row.__dict__)), None)
+            if description is None:
+                if not row.is_active:
+                    continue
+                row.is_active = False
+            elif row.is_active and row.description == description:
+                continue
+            else:
+                row.is_active = True
+                row.description = description
+            row.version = version
+            updates.append(row)
+
+        if version is None:
+            return len(updates) + len(desired)
+
+        creates = [
+            AgentWhitelistDevice(
+                agent_id=agent_id,
+                vendor_id=vendor_id,
+                product_id=product_id,
+                serial_number=serial_number,
+                description=description,
+                version=version,
+            )
+            for (agent_id, (vendor_id, product_id, serial_number)), description in desired.items()
+        ]
+        if updates:
+            AgentWhitelistDevice.objects.bulk_update(updates, ['is_active', 'description', 'version'], batch_size=1000)
+        if creates:
+            AgentWhitelistDevice.objects.bulk_create(creates, batch_size=1000)
+        return len(updates) + len(creates)
+
+
+usb_whitelist = UsbWhitelist()